@@ -0,0 +1,67 @@
+"""Lean serialization of ``values()`` rows.
+
+Every resource is described by a mapping of public field names to ORM
+lookups. Only the requested fields (``?fields=id,text``) are selected,
+so rows never become model instances and no template is rendered.
+"""
+from django.conf import settings
+
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comment_count': 'stats__comment_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def parse_fields(value, spec):
+    if not value:
+        return list(spec)
+    fields = [field for field in value.split(',') if field]
+    unknown = [field for field in fields if field not in spec]
+    if unknown:
+        raise ApiError(f'Unknown fields: {", ".join(unknown)}. '
+                       f'Available: {", ".join(spec)}.')
+    return fields
+
+
+def lookups(fields, spec, required=()):
+    """ORM lookups for ``values()``: the fields plus cursor keys."""
+    return list(dict.fromkeys([spec[field] for field in fields]
+                              + list(required)))
+
+
+def _image_url(name):
+    return settings.MEDIA_URL + name if name else None
+
+
+CONVERTERS = {
+    'image': _image_url,
+    'comment_count': lambda count: count or 0,
+}
+
+
+def serialize(row, fields, spec):
+    data = {}
+    for field in fields:
+        value = row[spec[field]]
+        convert = CONVERTERS.get(field)
+        data[field] = convert(value) if convert else value
+    return data
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+POSTS_QUANTITY = 15
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='group', slug='group_1', description='description')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.posts = [
+            Post.objects.create(text=f'text {i}', author=self.user,
+                                group=self.group)
+            for i in range(POSTS_QUANTITY)
+        ]
+
+    def get(self, name, args=(), client=None, **params):
+        client = client or self.guest_client
+        return client.get(reverse(f'api:{name}', args=args), params)
+
+    def test_listings_follow_cursors(self):
+        listings = (
+            ('posts', ()),
+            ('group_posts', (self.group.slug,)),
+            ('profile_posts', (self.user.username,)),
+        )
+        for name, args in listings:
+            with self.subTest(name=name):
+                first = self.get(name, args).json()
+                self.assertEqual(len(first['results']), 10)
+                self.assertEqual(first['results'][0]['text'], 'text 14')
+                self.assertIsNone(first['previous'])
+                second = self.guest_client.get(first['next']).json()
+                self.assertEqual(len(second['results']), 5)
+                self.assertIsNone(second['next'])
+                back = self.guest_client.get(second['previous']).json()
+                self.assertEqual(back['results'], first['results'])
+
+    def test_listing_runs_one_query(self):
+        with self.assertNumQueries(1):
+            self.get('posts', limit=100)
+
+    def test_sparse_fieldsets(self):
+        response = self.get('posts', fields='id,author', limit=1)
+        self.assertEqual(response.json()['results'],
+                         [{'id': self.posts[-1].id, 'author': 'author'}])
+
+    def test_unknown_field_is_400(self):
+        response = self.get('posts', fields='id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['detail'])
+
+    def test_post_detail_and_comments(self):
+        post = self.posts[0]
+        Comment.objects.create(post=post, author=self.reader, text='hi')
+        data = self.get('post', (post.id,)).json()
+        self.assertEqual(data['group'], self.group.slug)
+        self.assertEqual(data['comment_count'], 1)
+        self.assertIsNone(data['image'])
+        comments = self.get('comments', (post.id,)).json()['results']
+        self.assertEqual(comments[0]['author'], 'reader')
+        self.assertEqual(self.get('post', (0,)).status_code, 404)
+        self.assertEqual(self.get('comments', (0,)).status_code, 404)
+
+    def test_batch_keeps_order_and_reports_missing(self):
+        ids = [self.posts[3].id, 0, self.posts[1].id]
+        with self.assertNumQueries(1):
+            response = self.get('posts_batch', fields='id',
+                                ids=','.join(map(str, ids)))
+        self.assertEqual(response.json(), {
+            'results': [{'id': self.posts[3].id}, {'id': self.posts[1].id}],
+            'missing': [0],
+        })
+        for ids in ('1,x', '1,99999999999999999999999'):
+            with self.subTest(ids=ids):
+                self.assertEqual(
+                    self.get('posts_batch', ids=ids).status_code, 400)
+
+    def test_follow_feed(self):
+        self.assertEqual(self.get('follow_posts').status_code, 401)
+        Follow.objects.create(user=self.reader, author=self.user)
+        data = self.get('follow_posts', client=self.reader_client,
+                        fields='text').json()
+        self.assertEqual(data['results'][0], {'text': 'text 14'})
+        self.assertIsNotNone(data['next'])
+
+    def test_only_get_is_allowed(self):
+        response = self.guest_client.post(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,165 @@
+import functools
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import urlencode
+from django.views.decorators.http import require_GET
+
+from posts.models import Comment, Group, Post, TimelineEntry, User
+from posts.paginators import (
+    COMMENT_ORDERING, POST_ORDERING, POST_QUANTITY, CursorPaginator, parse_id
+)
+from posts.timeline import TIMELINE_ORDERING
+from .serializers import (
+    COMMENT_FIELDS, POST_FIELDS, ApiError, lookups, parse_fields, serialize
+)
+
+MAX_LIMIT = 100
+BATCH_LIMIT = 100
+
+
+def api_view(view):
+    """GET-only JSON view, errors are answered as ``{"detail": ...}``."""
+    @require_GET
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except ApiError as error:
+            return _json({'detail': error.detail}, status=error.status)
+        except Http404:
+            return _json({'detail': 'Not found.'}, status=404)
+        return _json(data)
+    return wrapper
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', POST_QUANTITY))
+    except ValueError:
+        raise ApiError('limit must be a number.')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _link(request, cursor_param, cursor):
+    params = request.GET.copy()
+    for param in ('after', 'before'):
+        params.pop(param, None)
+    params[cursor_param] = cursor
+    return request.build_absolute_uri(
+        f'{request.path}?{urlencode(sorted(params.items()))}')
+
+
+def _page(request, rows, ordering):
+    paginator = CursorPaginator(rows, _limit(request), ordering=ordering)
+    page = paginator.get_cursor_page(
+        after=request.GET.get('after'), before=request.GET.get('before'))
+    links = {
+        'next': (_link(request, 'after', page.next_cursor)
+                 if page.has_next() and page.next_cursor else None),
+        'previous': (_link(request, 'before', page.previous_cursor)
+                     if page.has_previous() and page.previous_cursor
+                     else None),
+    }
+    return page, links
+
+
+def _post_list(request, posts):
+    fields = parse_fields(request.GET.get('fields'), POST_FIELDS)
+    rows = posts.values(*lookups(fields, POST_FIELDS, POST_ORDERING))
+    page, links = _page(request, rows, POST_ORDERING)
+    return {
+        'results': [serialize(row, fields, POST_FIELDS) for row in page],
+        **links,
+    }
+
+
+@api_view
+def posts(request):
+    return _post_list(request, Post.objects.all())
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _post_list(request, Post.objects.filter(group=group))
+
+
+@api_view
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return _post_list(request, Post.objects.filter(author=author))
+
+
+@api_view
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Authentication required.', status=401)
+    fields = parse_fields(request.GET.get('fields'), POST_FIELDS)
+    entries = TimelineEntry.objects.filter(user=request.user).only(
+        *TIMELINE_ORDERING)
+    page, links = _page(request, entries, TIMELINE_ORDERING)
+    ids = [entry.post_id for entry in page]
+    rows = {
+        row['id']: row for row in Post.objects.filter(id__in=ids).values(
+            *lookups(fields, POST_FIELDS, ['id']))
+    }
+    return {
+        'results': [serialize(rows[pk], fields, POST_FIELDS)
+                    for pk in ids if pk in rows],
+        **links,
+    }
+
+
+@api_view
+def post(request, post_id):
+    fields = parse_fields(request.GET.get('fields'), POST_FIELDS)
+    row = Post.objects.filter(id=post_id).values(
+        *lookups(fields, POST_FIELDS)).first()
+    if row is None:
+        raise Http404
+    return serialize(row, fields, POST_FIELDS)
+
+
+@api_view
+def posts_batch(request):
+    """Posts for ``?ids=1,2,3`` in one query, in the requested order."""
+    fields = parse_fields(request.GET.get('fields'), POST_FIELDS)
+    try:
+        ids = list(dict.fromkeys(
+            parse_id(pk) for pk in request.GET.get('ids', '').split(',')
+            if pk))
+    except ValueError:
+        raise ApiError('ids must be a comma separated list of ids.')
+    if not ids:
+        raise ApiError('ids is required.')
+    if len(ids) > BATCH_LIMIT:
+        raise ApiError(f'At most {BATCH_LIMIT} ids per request.')
+    rows = {
+        row['id']: row for row in Post.objects.filter(id__in=ids).values(
+            *lookups(fields, POST_FIELDS, ['id']))
+    }
+    return {
+        'results': [serialize(rows[pk], fields, POST_FIELDS)
+                    for pk in ids if pk in rows],
+        'missing': [pk for pk in ids if pk not in rows],
+    }
+
+
+@api_view
+def comments(request, post_id):
+    if not Post.objects.filter(id=post_id).exists():
+        raise Http404
+    fields = parse_fields(request.GET.get('fields'), COMMENT_FIELDS)
+    rows = Comment.objects.filter(post_id=post_id).values(
+        *lookups(fields, COMMENT_FIELDS, COMMENT_ORDERING))
+    page, links = _page(request, rows, COMMENT_ORDERING)
+    return {
+        'results': [serialize(row, fields, COMMENT_FIELDS) for row in page],
+        **links,
+    }
@@ -0,0 +1,148 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite import apply_pragmas
+
+SCHEMA = (
+    'CREATE TABLE post (id INTEGER PRIMARY KEY, author_id INTEGER, '
+    'pub_date REAL, text TEXT)',
+    'CREATE INDEX post_author_pub_date ON post (author_id, pub_date)',
+)
+READ = ('SELECT id, text FROM post WHERE author_id = ? '
+        'ORDER BY pub_date DESC LIMIT 10')
+WRITE = 'INSERT INTO post (author_id, pub_date, text) VALUES (?, ?, ?)'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare SQLite throughput of the stock setup (rollback journal, '
+        'a connection per request), SQLITE_PRODUCTION_PRAGMAS alone and '
+        'with persistent connections, under concurrent readers and writers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--write-ratio', type=float, default=0.1)
+        parser.add_argument('--rows', type=int, default=20000)
+        parser.add_argument('--authors', type=int, default=100)
+
+    def handle(self, *args, **options):
+        profiles = {
+            'stock': ({}, False),
+            'pragmas': (settings.SQLITE_PRODUCTION_PRAGMAS, False),
+            'production': (settings.SQLITE_PRODUCTION_PRAGMAS, True),
+        }
+        self.stdout.write(
+            f'{"profile":<12}{"req/s":>10}{"reads/s":>10}{"writes/s":>10}'
+            f'{"locked":>8}{"p95 ms":>9}'
+        )
+        for name, (pragmas, persistent) in profiles.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.populate(path, pragmas, options)
+                row = self.run(path, pragmas, persistent, options)
+            self.stdout.write(
+                f'{name:<12}{row["requests"]:>10.0f}{row["reads"]:>10.0f}'
+                f'{row["writes"]:>10.0f}{row["locked"]:>8}'
+                f'{row["p95_ms"]:>9.2f}'
+            )
+
+    def populate(self, path, pragmas, options):
+        connection = connect(path, pragmas)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        rng = random.Random(0)
+        connection.execute('BEGIN')
+        connection.executemany(WRITE, (
+            (rng.randrange(options['authors']), i, 'текст ' * 20)
+            for i in range(options['rows'])
+        ))
+        connection.execute('COMMIT')
+        connection.close()
+
+    def run(self, path, pragmas, persistent, options):
+        load = Load(path, pragmas, persistent, options)
+        threads = [threading.Thread(target=load.worker, args=(seed,))
+                   for seed in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return load.summary()
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+class Load:
+    """Requests of all worker threads of one profile and their totals."""
+
+    def __init__(self, path, pragmas, persistent, options):
+        self.path = path
+        self.pragmas = pragmas
+        self.persistent = persistent
+        self.options = options
+        self.deadline = time.perf_counter() + options['seconds']
+        self.lock = threading.Lock()
+        self.totals = {'reads': 0, 'writes': 0, 'locked': 0}
+        self.timings = []
+
+    def request(self, db, rng, counts):
+        authors = self.options['authors']
+        if rng.random() < self.options['write_ratio']:
+            db.execute(WRITE, (rng.randrange(authors), time.time(),
+                               'новый текст'))
+            counts['writes'] += 1
+        else:
+            db.execute(READ, (rng.randrange(authors),)).fetchall()
+            counts['reads'] += 1
+
+    def timed_request(self, connection, rng, counts):
+        started = time.perf_counter()
+        db = connection or connect(self.path, self.pragmas)
+        try:
+            self.request(db, rng, counts)
+        except sqlite3.OperationalError:
+            counts['locked'] += 1
+        finally:
+            if connection is None:
+                db.close()
+        return time.perf_counter() - started
+
+    def worker(self, seed):
+        rng = random.Random(seed)
+        counts = dict.fromkeys(self.totals, 0)
+        spent = []
+        connection = (connect(self.path, self.pragmas)
+                      if self.persistent else None)
+        while time.perf_counter() < self.deadline:
+            spent.append(self.timed_request(connection, rng, counts))
+        if connection is not None:
+            connection.close()
+        with self.lock:
+            for key, value in counts.items():
+                self.totals[key] += value
+            self.timings.extend(spent)
+
+    def summary(self):
+        totals, timings = self.totals, sorted(self.timings)
+        seconds = self.options['seconds']
+        return {
+            'requests': (totals['reads'] + totals['writes']) / seconds,
+            'reads': totals['reads'] / seconds,
+            'writes': totals['writes'] / seconds,
+            'locked': totals['locked'],
+            'p95_ms': (timings[int(len(timings) * 0.95)] * 1000
+                       if timings else 0),
+        }
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh SQLite planner statistics (PRAGMA optimize, or a full '
+        'ANALYZE) and checkpoint the WAL. Meant to run periodically.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help='Run a full ANALYZE instead of optimize.')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            self.stdout.write('Not an SQLite database, nothing to do.')
+            return
+        checkpoint = sqlite.optimize(connection, analyze=options['analyze'])
+        busy, wal_pages, moved = checkpoint or (0, 0, 0)
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Analyzed" if options["analyze"] else "Optimized"} '
+            f'{options["database"]}, checkpointed {moved} of {wal_pages} '
+            f'WAL pages{" (busy)" if busy else ""}.'
+        ))
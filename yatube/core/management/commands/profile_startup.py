@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: this process has imported everything.
+SCRIPT = '''
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - started
+from core.warmup import warm_up
+report = [('django_setup', setup, 0)] + warm_up()
+print(json.dumps(report))
+'''
+
+
+def parse_importtime(lines):
+    """``-X importtime`` output -> ``{module: (self_us, cumulative_us)}``."""
+    modules = {}
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split(
+            '|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Start a fresh interpreter with -X importtime, set Django up and '
+        'warm it up, then report the slowest imports and each warm-up '
+        'step.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Number of modules to list, by cumulative import time.'
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ,
+                   DJANGO_SETTINGS_MODULE=os.environ.get(
+                       'DJANGO_SETTINGS_MODULE', 'yatube.settings'))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', SCRIPT],
+            cwd=os.getcwd(), env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        modules = parse_importtime(result.stderr.splitlines())
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+
+        total = sum(self_us for self_us, _ in modules.values())
+        self.stdout.write(
+            f'Imported {len(modules)} modules in {total / 1000:.1f} ms.')
+        self.stdout.write(f'{"module":<50}{"self ms":>10}{"total ms":>10}')
+        slowest = sorted(modules.items(), key=lambda item: item[1][1],
+                         reverse=True)[:options['limit']]
+        for name, (self_us, cumulative_us) in slowest:
+            self.stdout.write(
+                f'{name:<50}{self_us / 1000:>10.1f}'
+                f'{cumulative_us / 1000:>10.1f}'
+            )
+        self.stdout.write('')
+        self.stdout.write(f'{"step":<20}{"ms":>10}{"count":>8}')
+        for name, seconds, count in report:
+            self.stdout.write(f'{name:<20}{seconds * 1000:>10.1f}{count:>8}')
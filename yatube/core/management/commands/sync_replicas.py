@@ -0,0 +1,34 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh the local SQLite replicas from the primary database with '
+        'the online backup API. Run it from cron to bound replica lag.'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No replicas, set DATABASE_REPLICAS.')
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError(
+                'Only SQLite replicas are file copies, use the replication '
+                'of your database server instead.')
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            # Copy into the live file: readers with persistent
+            # connections keep the old inode if it is replaced.
+            name = connections[alias].settings_dict['NAME']
+            target = sqlite3.connect(name, timeout=20)
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Synced {len(settings.DATABASE_REPLICAS)} replicas.'))
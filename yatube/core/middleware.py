@@ -0,0 +1,204 @@
+import contextvars
+import functools
+import heapq
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+from . import routers, staticfiles
+
+logger = logging.getLogger('yatube.profiling')
+slow_query_logger = logging.getLogger('yatube.slow_queries')
+
+SLOWEST_QUERIES = 5
+
+_current = contextvars.ContextVar('request_profile', default=None)
+_instrumented = False
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.template = 0.0
+        self.thumbnail = 0.0
+        self.slowest = []
+        self.slow = []
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.db += duration
+            self.queries += 1
+            entry = (duration, sql)
+            if len(self.slowest) < SLOWEST_QUERIES:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+            if duration * 1000 >= settings.SLOW_QUERY_MS:
+                self.slow.append(entry)
+
+    def timed(self, attribute, func, *args, **kwargs):
+        """Add the self time of ``func`` (minus nested SQL) to a counter."""
+        started = time.perf_counter()
+        nested = self.db + self.template + self.thumbnail
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = self.db + self.template + self.thumbnail - nested
+            setattr(self, attribute,
+                    getattr(self, attribute) + elapsed - nested)
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        app = self.total - self.db - self.template - self.thumbnail
+        metrics = [
+            ('total', self.total, None),
+            ('db', self.db, f'{self.queries} queries'),
+            ('tpl', self.template, None),
+            ('thumb', self.thumbnail, None),
+            ('app', max(app, 0), None),
+        ]
+        return ', '.join(
+            f'{name};dur={seconds * 1000:.2f}'
+            + (f';desc="{desc}"' if desc else '')
+            for name, seconds, desc in metrics
+        )
+
+    def slowest_queries(self):
+        return sorted(self.slowest, reverse=True)
+
+
+def _profiled(attribute, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        return profile.timed(attribute, func, *args, **kwargs)
+    return wrapper
+
+
+def instrument():
+    """Wrap template rendering and thumbnail lookups, once per process."""
+    global _instrumented
+    if _instrumented:
+        return
+    from sorl.thumbnail.base import ThumbnailBackend
+    Template.render = _profiled('template', Template.render)
+    ThumbnailBackend.get_thumbnail = _profiled(
+        'thumbnail', ThumbnailBackend.get_thumbnail)
+    _instrumented = True
+
+
+class ProfilingMiddleware:
+    """Opt-in per-request profile exposed through ``Server-Timing``.
+
+    Enabled by ``settings.REQUEST_PROFILING``. Queries slower than
+    ``settings.SLOW_QUERY_MS`` are logged to ``yatube.slow_queries``
+    together with the name of the view that ran them.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrument()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        request.profile = profile
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        profile.finish()
+        response['Server-Timing'] = profile.server_timing()
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else request.path
+        for duration, sql in profile.slow:
+            slow_query_logger.warning(
+                '%s %.1fms %s', view_name, duration * 1000, sql)
+        logger.debug('%s %s', view_name, response['Server-Timing'])
+        for duration, sql in profile.slowest_queries():
+            logger.debug('%s   %.1fms %s', view_name, duration * 1000, sql)
+        return response
+
+
+class ReplicaMiddleware:
+    """Mark read-only views for replica reads, with read-your-writes.
+
+    GET requests to ``settings.REPLICA_VIEWS`` read from a replica. A
+    request that wrote to the primary sets a cookie, and for the next
+    ``settings.REPLICA_STICKY_SECONDS`` that client reads from the
+    primary, so it always sees its own post, comment or follow.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state, token = routers.begin()
+        request.replica_routing = state
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.end(token)
+        if state.wrote:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.replica_routing.replica_reads = (
+            request.method in ('GET', 'HEAD')
+            and settings.REPLICA_STICKY_COOKIE not in request.COOKIES
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+        )
+
+
+class StaticFilesMiddleware:
+    """Serve collected static files before any other middleware runs.
+
+    Only with ``settings.STATIC_SERVE``: the development server serves
+    static files itself, and a front-end server may take over as well.
+    See core.staticfiles for the variants and cache headers.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+
+    def __call__(self, request):
+        if (request.method in ('GET', 'HEAD')
+                and request.path.startswith(self.prefix)):
+            response = staticfiles.serve(
+                request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
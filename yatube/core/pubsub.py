@@ -0,0 +1,90 @@
+import collections
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """Bounded buffer of one listener.
+
+    When the listener falls behind, the oldest messages are dropped and
+    counted in ``dropped``, so memory per connection stays fixed.
+    """
+
+    def __init__(self, broker, channel, size):
+        self.broker = broker
+        self.channel = channel
+        self.messages = collections.deque(maxlen=size)
+        self.dropped = 0
+        self.ready = threading.Condition()
+
+    def put(self, message):
+        with self.ready:
+            if len(self.messages) == self.messages.maxlen:
+                self.dropped += 1
+            self.messages.append(message)
+            self.ready.notify()
+
+    def get(self, timeout):
+        """Wait up to ``timeout`` seconds, return ``(messages, dropped)``."""
+        deadline = time.monotonic() + timeout
+        with self.ready:
+            while not self.messages:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [], 0
+                self.ready.wait(remaining)
+            messages, dropped = list(self.messages), self.dropped
+            self.messages.clear()
+            self.dropped = 0
+        return messages, dropped
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Publish/subscribe between threads of one process.
+
+    Enough for a single server process. A multi-process deployment
+    points ``settings.PUBSUB_BROKER`` at a class with the same three
+    methods backed by a local broker.
+    """
+
+    def __init__(self):
+        self.channels = collections.defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel, size=None):
+        subscription = Subscription(
+            self, channel, size or settings.PUBSUB_BUFFER_SIZE)
+        with self.lock:
+            self.channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            listeners = self.channels.get(subscription.channel)
+            if listeners is not None:
+                listeners.discard(subscription)
+                if not listeners:
+                    del self.channels[subscription.channel]
+
+    def publish(self, channel, message):
+        with self.lock:
+            listeners = list(self.channels.get(channel, ()))
+        for subscription in listeners:
+            subscription.put(message)
+        return len(listeners)
+
+
+@functools.lru_cache(maxsize=None)
+def _broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    return _broker(settings.PUBSUB_BROKER)
@@ -0,0 +1,79 @@
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Sessions are read on every request: a replica that lags behind a
+# login would log the user out.
+PRIMARY_APPS = ('sessions',)
+
+_state = contextvars.ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    def __init__(self):
+        self.replica_reads = False
+        self.wrote = False
+
+
+def begin():
+    """Start routing for a request, return the token for ``end``."""
+    state = RoutingState()
+    return state, _state.set(state)
+
+
+def end(token):
+    _state.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, also usable as decorator.
+
+    For reads whose result is stored under a version from the cache: a
+    lagging replica would pair old rows with a new version.
+    """
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    replica_reads, state.replica_reads = state.replica_reads, False
+    try:
+        yield
+    finally:
+        state.replica_reads = replica_reads
+
+
+class ReplicaRouter:
+    """Send reads to ``settings.DATABASE_REPLICAS`` when a request allows it.
+
+    Reads go to a replica only inside a request that
+    ``core.middleware.ReplicaMiddleware`` marked as read-only and only
+    outside of transactions on the primary. Everything else, including
+    management commands and the shell, uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = settings.DATABASE_REPLICAS
+        if state is None or not state.replica_reads or not replicas:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,32 @@
+from django.conf import settings
+
+
+def apply_pragmas(connection, pragmas):
+    """Run ``PRAGMA name = value`` for every item on a DB-API connection."""
+    cursor = connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def configure_connection(sender, connection, **kwargs):
+    """connection_created receiver applying ``settings.SQLITE_PRAGMAS``.
+
+    journal_mode is stored in the database file, the other pragmas only
+    last as long as the connection, which is why they are set on every
+    new one.
+    """
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection, settings.SQLITE_PRAGMAS)
+
+
+def optimize(connection, analyze=False, checkpoint=True):
+    """Refresh planner statistics and fold the WAL back into the file."""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE' if analyze else 'PRAGMA optimize')
+        if checkpoint:
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            return cursor.fetchone()
+    return None
@@ -0,0 +1,133 @@
+"""Hashed, precompressed static files.
+
+``collectstatic`` with CompressedManifestStorage writes every file under
+a content-hashed name plus a manifest, and next to each text file a
+``.gz`` and, when the optional ``brotli`` package is installed, a
+``.br`` variant. ``serve`` answers with the smallest variant the client
+accepts; hashed names never change their content, so they are sent with
+a year-long immutable Cache-Control.
+"""
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage
+)
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.json', '.map', '.svg', '.txt', '.xml', '.html', '.ico',
+)
+# A variant that saves less than this share of the size is not worth a
+# second file and a Vary header.
+MIN_SAVING = 0.05
+IMMUTABLE = 'public, max-age={max_age}, immutable'
+REVALIDATE = 'public, max-age=60'
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data)
+
+
+def compressors():
+    """``(Content-Encoding, suffix, function)`` best first."""
+    found = [('gzip', '.gz', _gzip)]
+    if brotli is not None:
+        found.insert(0, ('br', '.br', _brotli))
+    return found
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    # Before the first collectstatic (development, tests) templates get
+    # the plain names instead of a missing manifest error.
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(paths) | set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        for _, suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                with open(path + suffix, 'wb') as file:
+                    file.write(compressed)
+
+    def is_immutable(self, name):
+        """Whether ``name`` is a content-hashed name from the manifest."""
+        if not hasattr(self, '_immutable_names'):
+            self._immutable_names = frozenset(self.hashed_files.values())
+        return name in self._immutable_names
+
+
+def _accepted(request):
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve(request, name):
+    """Response for a collected file or None when there is no such file."""
+    try:
+        path = safe_join(settings.STATIC_ROOT, name)
+    except SuspiciousFileOperation:
+        return None
+    if not os.path.isfile(path):
+        return None
+    stat = os.stat(path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        response = HttpResponseNotModified()
+    else:
+        content_type = (mimetypes.guess_type(name)[0]
+                        or 'application/octet-stream')
+        encoding = None
+        accepted = _accepted(request)
+        for coding, suffix, _ in compressors():
+            if coding in accepted and os.path.isfile(path + suffix):
+                encoding, path = coding, path + suffix
+                break
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    if name.endswith(COMPRESSIBLE):
+        response['Vary'] = 'Accept-Encoding'
+    storage = staticfiles_storage
+    if getattr(storage, 'is_immutable', None) and storage.is_immutable(name):
+        response['Cache-Control'] = IMMUTABLE.format(
+            max_age=settings.STATIC_MAX_AGE)
+    else:
+        response['Cache-Control'] = REVALIDATE
+    return response
@@ -0,0 +1,16 @@
+from django import template
+
+register = template.Library()
+
+PAGINATION_PARAMS = ('page', 'after', 'before')
+
+
+@register.simple_tag(takes_context=True)
+def with_params(context, **params):
+    """Current query string with pagination params replaced by ``params``."""
+    query = context['request'].GET.copy()
+    for name in PAGINATION_PARAMS:
+        query.pop(name, None)
+    for name, value in params.items():
+        query[name] = value
+    return query.urlencode()
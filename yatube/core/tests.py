@@ -0,0 +1,311 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, TransactionTestCase, \
+    override_settings
+from django.urls import reverse
+
+from posts.cards import card_key
+from posts.models import Post
+from .management.commands.profile_startup import parse_importtime
+from .pubsub import InProcessBroker
+from .routers import ReplicaRouter
+from .throttling import take
+from .warmup import warm_up
+
+User = get_user_model()
+PROFILING_MIDDLEWARE = 'core.middleware.ProfilingMiddleware'
+
+
+@override_settings(REQUEST_PROFILING=True, SLOW_QUERY_MS=0)
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.guest_client = Client()
+        Post.objects.create(text='text', author=self.user)
+
+    def test_server_timing_header(self):
+        response = self.guest_client.get(reverse('posts:main_posts'))
+        timing = response['Server-Timing']
+        for metric in ('total;dur=', 'db;dur=', 'tpl;dur=', 'app;dur='):
+            self.assertIn(metric, timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    def test_slow_queries_are_logged_with_view_name(self):
+        with mock.patch(
+                'core.middleware.slow_query_logger.warning') as warning:
+            self.guest_client.get(reverse('posts:main_posts'))
+        self.assertTrue(warning.called)
+        self.assertEqual(warning.call_args[0][1], 'posts:main_posts')
+
+
+class ProfilingDisabledTests(TestCase):
+    def test_no_header_by_default(self):
+        response = Client().get(reverse('about:author'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class SequenceResetMixin:
+    """Leave SQLite's AUTOINCREMENT counters as the test found them.
+
+    TransactionTestCase commits its rows, and the flush after it keeps
+    the counters in sqlite_sequence, so later tests would get other ids.
+    Django 2.2 does not reset sequences on SQLite (``reset_sequences``).
+    Without a sqlite_sequence row the next id is max(id) + 1, which is 1
+    once the flush has emptied the tables.
+    """
+
+    def tearDown(self):
+        with connections['default'].cursor() as cursor:
+            cursor.execute('DELETE FROM sqlite_sequence')
+        super().tearDown()
+
+
+class ReplicaRoutingTests(SequenceResetMixin, TransactionTestCase):
+    """Run against a real file copy of the test database."""
+
+    alias = 'replica_test'
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        connections.databases[self.alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory, 'replica.sqlite3'),
+        }
+        connections.ensure_defaults(self.alias)
+        connections.prepare_test_settings(self.alias)
+        self.addCleanup(self.drop_replica)
+        replicas = override_settings(DATABASE_REPLICAS=[self.alias])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+
+        self.user = User.objects.create_user(username='author')
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+        Post.objects.create(text='synced post', author=self.user)
+        call_command('sync_replicas', stdout=io.StringIO())
+        Post.objects.create(text='fresh post', author=self.user)
+
+    def drop_replica(self):
+        connections[self.alias].close()
+        del connections[self.alias]
+        del connections.databases[self.alias]
+
+    def test_read_only_views_read_from_replica(self):
+        response = Client().get(reverse('posts:main_posts'))
+        self.assertContains(response, 'synced post')
+        self.assertNotContains(response, 'fresh post')
+
+    def test_other_views_read_from_primary(self):
+        response = Client().get(reverse('posts:search'), {'q': 'fresh'})
+        self.assertContains(response, 'fresh post')
+
+    def test_writer_reads_own_writes(self):
+        response = self.author_client.post(
+            reverse('posts:post_create'), {'text': 'my new post'})
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+        response = self.author_client.get(reverse('posts:main_posts'))
+        self.assertContains(response, 'my new post')
+        response = Client().get(reverse('posts:main_posts'))
+        self.assertNotContains(response, 'my new post')
+
+    def test_cards_are_not_cached_from_stale_replica(self):
+        post = Post.objects.get(text='synced post')
+        post.text = 'edited post'
+        post.save()
+        response = Client().get(reverse('posts:main_posts'))
+        self.assertContains(response, 'edited post')
+        version = cache.get(f'posts:card-version:post:{post.pk}')
+        card = cache.get(card_key(post, {post.pk: version}, {}))
+        self.assertIn('edited post', card)
+
+    def test_conditional_pages_read_from_primary(self):
+        post = Post.objects.get(text='synced post')
+        post.text = 'edited post'
+        post.save()
+        address = reverse('posts:post_detail', args=(post.pk,))
+        response = Client().get(address)
+        self.assertContains(response, 'edited post')
+        response = Client().get(address, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_router_uses_primary_outside_requests(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Post), 'default')
+
+
+class SqliteProfileTests(TestCase):
+    def pragma(self, name):
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        self.assertEqual(self.pragma('busy_timeout'),
+                         settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('cache_size'),
+                         settings.SQLITE_PRAGMAS['cache_size'])
+
+    def test_bench_sqlite_reports_every_profile(self):
+        out = io.StringIO()
+        call_command('bench_sqlite', '--seconds', '0.05', '--rows', '10',
+                     '--threads', '2', stdout=out)
+        for profile in ('stock', 'pragmas', 'production'):
+            self.assertIn(profile, out.getvalue())
+
+
+class OptimizeDbTests(SequenceResetMixin, TransactionTestCase):
+    """ANALYZE cannot run inside the transaction of a TestCase."""
+
+    def test_optimize_db(self):
+        for args, verb in (((), 'Optimized'), (('--analyze',), 'Analyzed')):
+            out = io.StringIO()
+            call_command('optimize_db', *args, stdout=out)
+            self.assertIn(f'{verb} default', out.getvalue())
+
+
+class PubSubTests(TestCase):
+    def test_buffer_is_bounded(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe('channel', size=2)
+        for number in range(5):
+            self.assertEqual(broker.publish('channel', number), 1)
+        self.assertEqual(subscription.get(timeout=0), ([3, 4], 3))
+        self.assertEqual(subscription.get(timeout=0.01), ([], 0))
+
+    def test_closed_subscription_gets_nothing(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe('channel')
+        subscription.close()
+        self.assertEqual(broker.publish('channel', 'message'), 0)
+        self.assertFalse(broker.channels)
+
+
+class ThrottleTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_bucket_refills_over_time(self):
+        for _ in range(3):
+            self.assertEqual(take('scope', ['ip:1'], '3/m', now=0), 0)
+        self.assertAlmostEqual(take('scope', ['ip:1'], '3/m', now=0), 20)
+        self.assertAlmostEqual(take('scope', ['ip:1'], '3/m', now=15), 5)
+        self.assertEqual(take('scope', ['ip:1'], '3/m', now=20), 0)
+
+    def test_empty_bucket_takes_nothing_from_others(self):
+        take('scope', ['user:1'], '1/m', now=0)
+        self.assertTrue(take('scope', ['ip:1', 'user:1'], '1/m', now=0))
+        self.assertEqual(take('scope', ['ip:1'], '1/m', now=0), 0)
+
+    @override_settings(THROTTLE_RATES={'post_create': '2/m'})
+    def test_write_over_the_rate_gets_429(self):
+        address = reverse('posts:post_create')
+        for _ in range(2):
+            self.client.post(address, {'text': 'text'})
+        response = self.client.post(address, {'text': 'text'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(self.client.get(address).status_code, 200)
+
+    @override_settings(WRITE_CONCURRENCY=0, WRITE_QUEUE_SECONDS=0)
+    def test_busy_writers_shed_load(self):
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'text'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Post.objects.exists())
+
+
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings = override_settings(STATIC_ROOT=cls.static_root)
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def hashed(self, name):
+        return staticfiles_storage.stored_name(name)
+
+    def test_collectstatic_writes_hashed_and_gzipped_files(self):
+        name = self.hashed('css/bootstrap.min.css')
+        self.assertNotEqual(name, 'css/bootstrap.min.css')
+        path = os.path.join(self.static_root, name)
+        with open(path, 'rb') as original, \
+                gzip.open(path + '.gz', 'rb') as compressed:
+            self.assertEqual(compressed.read(), original.read())
+        self.assertFalse(os.path.exists(os.path.join(
+            self.static_root, self.hashed('img/logo.png') + '.gz')))
+
+    @override_settings(STATIC_SERVE=True)
+    def test_hashed_file_is_served_compressed_and_immutable(self):
+        url = settings.STATIC_URL + self.hashed('css/bootstrap.min.css')
+        response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        plain = Client().get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+    @override_settings(STATIC_SERVE=True)
+    def test_unhashed_and_missing_files(self):
+        response = Client().get(settings.STATIC_URL + 'img/logo.png')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        response = Client().get(settings.STATIC_URL + '../manage.py')
+        self.assertEqual(response.status_code, 404)
+        response = Client().get(settings.STATIC_URL + 'missing.css')
+        self.assertEqual(response.status_code, 404)
+
+
+class WarmupTests(TestCase):
+    def test_every_step_runs(self):
+        cache.clear()
+        report = {name: count for name, _, count in warm_up(freeze=False)}
+        self.assertEqual(
+            list(report), ['templates', 'urls', 'thumbnails', 'apps'])
+        self.assertGreater(report['templates'], 0)
+        self.assertEqual(report['apps'], 1)
+        self.assertIsNotNone(cache.get('posts:count:all'))
+
+    def test_parse_importtime(self):
+        lines = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |   posts.models',
+            'import time:        30 |        150 | posts',
+            'unrelated output',
+        ]
+        self.assertEqual(parse_importtime(lines), {
+            'posts.models': (120, 120),
+            'posts': (30, 150),
+        })
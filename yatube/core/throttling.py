@@ -0,0 +1,112 @@
+"""Rate limits and load shedding for views that write.
+
+Every limited view has a scope in ``settings.THROTTLE_RATES`` such as
+``'10/m'``: a token bucket of ten requests refilled at ten per minute,
+kept in the cache once per user and once per client address. A request
+that finds either bucket empty is answered 429 with ``Retry-After``.
+
+On top of that at most ``settings.WRITE_CONCURRENCY`` limited requests
+of a process run at once. SQLite has a single writer, so further
+requests would only wait for its lock; they get a 503 after
+``settings.WRITE_QUEUE_SECONDS`` instead.
+
+Buckets are read and written without a lock, so concurrent requests of
+one client may occasionally both take the last token.
+"""
+import functools
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """``'10/m'`` -> ``(10, 60)``: bucket size and refill period."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def _bucket_key(scope, ident):
+    return f'throttle:{scope}:{ident}'
+
+
+def _client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _idents(request):
+    idents = [f'ip:{_client_ip(request)}']
+    if request.user.is_authenticated:
+        idents.append(f'user:{request.user.pk}')
+    return idents
+
+
+def take(scope, idents, rate, now=None):
+    """Take a token from every bucket, return seconds to wait or 0.
+
+    Nothing is taken unless every bucket has a token.
+    """
+    size, period = parse_rate(rate)
+    refill = size / period
+    now = time.time() if now is None else now
+    keys = [_bucket_key(scope, ident) for ident in idents]
+    stored = cache.get_many(keys)
+    buckets = {}
+    wait = 0
+    for key in keys:
+        tokens, updated = stored.get(key, (size, now))
+        tokens = min(size, tokens + (now - updated) * refill)
+        if tokens < 1:
+            wait = max(wait, (1 - tokens) / refill)
+        buckets[key] = (tokens - 1, now)
+    if wait:
+        return wait
+    cache.set_many(buckets, period)
+    return 0
+
+
+def _writer_slots():
+    limit = settings.WRITE_CONCURRENCY
+    with _writers_lock:
+        if limit not in _writers:
+            _writers[limit] = threading.BoundedSemaphore(limit)
+        return _writers[limit]
+
+
+def _refuse(status, retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.', status=status,
+        content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def throttle(scope, methods=('POST',)):
+    """Limit requests of ``methods`` to the rate of ``scope``."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return view(request, *args, **kwargs)
+            rate = settings.THROTTLE_RATES.get(scope)
+            if rate:
+                wait = take(scope, _idents(request), rate)
+                if wait:
+                    return _refuse(429, wait)
+            slots = _writer_slots()
+            if not slots.acquire(timeout=settings.WRITE_QUEUE_SECONDS):
+                return _refuse(503, 1)
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                slots.release()
+        return wrapper
+    return decorator
@@ -0,0 +1,113 @@
+"""Warm a worker up before it accepts traffic.
+
+``warm_up`` compiles every template, builds the URL resolver (importing
+every view on the way), sets up sorl's thumbnail backend and runs the
+``warm_up`` method of every app config that has one, for app-specific
+caches. Database connections opened on the way are closed again: a
+SQLite connection must not be shared with forked workers. Finally the
+surviving objects are moved out of the garbage collector's reach with
+``gc.freeze``, so workers forked after it do not copy the pages those
+objects live on.
+
+It runs from ``yatube/wsgi.py`` when ``settings.WARMUP`` is set. With a
+pre-forking server that loads the application in the master process
+(gunicorn ``--preload``) that happens once, before the fork.
+
+Templates stay compiled only with the cached template loader, which
+Django uses whenever DEBUG is off.
+"""
+import gc
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.db import DatabaseError, connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+logger = logging.getLogger('yatube.warmup')
+
+TEMPLATE_SUFFIXES = ('.html', '.txt', '.xml')
+
+
+def _template_names(template_dirs):
+    for template_dir in template_dirs:
+        for root, _, files in os.walk(template_dir):
+            for file_name in files:
+                if file_name.endswith(TEMPLATE_SUFFIXES):
+                    path = os.path.join(root, file_name)
+                    yield os.path.relpath(path, template_dir).replace(
+                        os.sep, '/')
+
+
+def compile_templates():
+    """Load every template once, return the number compiled."""
+    compiled = 0
+    for engine in engines.all():
+        for name in set(_template_names(engine.template_dirs)):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                # Partial files of other engines, e.g. admin's JS.
+                logger.debug('Skipped template %s', name)
+                continue
+            compiled += 1
+    return compiled
+
+
+def populate_urls():
+    resolver = get_resolver()
+    return len(resolver.reverse_dict)
+
+
+def load_thumbnails():
+    from sorl.thumbnail import default
+    backends = (default.backend, default.engine, default.kvstore,
+                default.storage)
+    return len([backend.__class__ for backend in backends])
+
+
+def warm_apps():
+    warmed = 0
+    for app_config in apps.get_app_configs():
+        warm = getattr(app_config, 'warm_up', None)
+        if warm is None:
+            continue
+        try:
+            warm()
+        except DatabaseError:
+            # A worker still starts without warm caches, e.g. before
+            # the first migrate.
+            logger.warning('Warm-up of %s failed', app_config.label,
+                           exc_info=True)
+            continue
+        warmed += 1
+    return warmed
+
+
+STEPS = (
+    ('templates', compile_templates),
+    ('urls', populate_urls),
+    ('thumbnails', load_thumbnails),
+    ('apps', warm_apps),
+)
+
+
+def warm_up(freeze=True):
+    """Run every step, return ``[(step, seconds, count), ...]``."""
+    report = []
+    for name, step in STEPS:
+        started = time.perf_counter()
+        count = step()
+        report.append((name, time.perf_counter() - started, count))
+    connections.close_all()
+    if freeze:
+        started = time.perf_counter()
+        gc.collect()
+        gc.freeze()
+        report.append(('gc_freeze', time.perf_counter() - started,
+                       gc.get_freeze_count()))
+    for name, seconds, count in report:
+        logger.info('Warm-up %s: %d in %.1f ms', name, count, seconds * 1000)
+    return report
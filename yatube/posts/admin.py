@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Post, Group
 
 
@@ -17,6 +18,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        match = search.build_match(search.split_terms(search_term))
+        if not match or not search.fts_enabled():
+            return super().get_search_results(
+                request, queryset, search_term)
+        return queryset.filter(id__in=search.matching_ids(match)), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
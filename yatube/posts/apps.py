@@ -3,3 +3,15 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+    def warm_up(self):
+        """Fill the caches every listing page reads first."""
+        from . import conditional
+        from .models import Post
+        from .paginators import POST_QUANTITY, CursorPaginator, count_key
+        conditional.versions('all', 'groups')
+        CursorPaginator(Post.objects.all(), POST_QUANTITY,
+                        count_key=count_key('all')).count
@@ -0,0 +1,190 @@
+import platform
+import random
+import time
+import tracemalloc
+
+import django
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import counters, timeline
+from .models import Comment, Follow, Group, Post, PostStats, User
+
+PERCENTILES = (50, 95, 99)
+
+
+def populate(users=50, groups=10, posts=2000, comments=3, follows=10,
+             seed=0):
+    """Fill the current database with a reproducible synthetic data set.
+
+    Rows are bulk inserted, so the denormalized tables (counters and
+    timelines) are rebuilt afterwards instead of through signals.
+    """
+    rng = random.Random(seed)
+    User.objects.bulk_create(
+        [User(username=f'bench_{i}') for i in range(users)]
+    )
+    user_ids = list(User.objects.filter(
+        username__startswith='bench_').values_list('id', flat=True))
+    Group.objects.bulk_create(
+        [Group(title=f'Группа {i}', slug=f'bench-{i}',
+               description='Группа для замеров') for i in range(groups)]
+    )
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-').values_list('id', flat=True))
+    Post.objects.bulk_create(
+        [Post(text=f'Пост номер {i} ' + 'текст ' * rng.randint(5, 50),
+              author_id=rng.choice(user_ids),
+              group_id=rng.choice(group_ids + [None]))
+         for i in range(posts)]
+    )
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    Comment.objects.bulk_create(
+        [Comment(post_id=post_id, author_id=rng.choice(user_ids),
+                 text='Комментарий')
+         for post_id in post_ids for _ in range(comments)]
+    )
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=author_id)
+         for user_id in user_ids
+         for author_id in rng.sample(user_ids, min(follows, len(user_ids)))
+         if author_id != user_id],
+        ignore_conflicts=True,
+    )
+    PostStats.objects.bulk_create(
+        [PostStats(post_id=post_id) for post_id in post_ids],
+        ignore_conflicts=True,
+    )
+    counters.recount_posts()
+    counters.recount_authors(user_ids)
+    for user_id in user_ids:
+        timeline.rebuild(user_id)
+
+
+def scenarios():
+    """Return ``(name, method, url, data, setup)`` for posts.urls views.
+
+    ``setup`` runs before every request, outside of the timed region, to
+    put the database back into the state the request expects.
+    """
+    user = User.objects.filter(
+        username__startswith='bench_',
+        posts__isnull=False,
+        follower__isnull=False,
+    ).first()
+    author = Follow.objects.filter(user=user).first().author
+    post = Post.objects.filter(author=user).first()
+    group = Group.objects.filter(posts__isnull=False).first()
+    other = Post.objects.exclude(author=user).first()
+
+    def refollow():
+        Follow.objects.get_or_create(user=user, author=author)
+
+    return [
+        ('index', 'get', reverse('posts:main_posts'), None, None),
+        ('index_deep', 'get', reverse('posts:main_posts') + '?page=50',
+         None, None),
+        ('group_posts', 'get',
+         reverse('posts:group_list', args=(group.slug,)), None, None),
+        ('profile', 'get', reverse('posts:profile', args=(author,)),
+         None, None),
+        ('post_detail', 'get',
+         reverse('posts:post_detail', args=(other.id,)), None, None),
+        ('search', 'get', reverse('posts:search') + '?q=текст', None, None),
+        ('follow_index', 'get', reverse('posts:follow_index'), None, None),
+        ('post_create_form', 'get', reverse('posts:post_create'),
+         None, None),
+        ('post_create', 'post', reverse('posts:post_create'),
+         {'text': 'Новый пост'}, None),
+        ('post_edit', 'post', reverse('posts:post_edit', args=(post.id,)),
+         {'text': 'Отредактированный пост'}, None),
+        ('add_comment', 'post',
+         reverse('posts:add_comment', args=(other.id,)),
+         {'text': 'Новый комментарий'}, None),
+        ('profile_follow', 'get',
+         reverse('posts:profile_follow', args=(author,)), None, None),
+        ('profile_unfollow', 'get',
+         reverse('posts:profile_unfollow', args=(author,)), None, refollow),
+    ], user
+
+
+def percentile(samples, rank):
+    ordered = sorted(samples)
+    index = max(0, -(-rank * len(ordered) // 100) - 1)
+    return ordered[index]
+
+
+def measure(client, method, url, data, setup, iterations, warmup):
+    send = getattr(client, method)
+    setup = setup or (lambda: None)
+    for _ in range(warmup):
+        setup()
+        send(url, data)
+    timings = []
+    queries = 0
+    for _ in range(iterations):
+        setup()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = send(url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, len(captured))
+    setup()
+    tracemalloc.start()
+    send(url, data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        f'p{rank}_ms': round(percentile(timings, rank), 3)
+        for rank in PERCENTILES
+    }
+    result.update(
+        status=response.status_code,
+        queries=queries,
+        alloc_peak_kib=round(peak / 1024, 1),
+    )
+    return result
+
+
+def run(iterations=50, warmup=5, only=None):
+    items, user = scenarios()
+    client = Client()
+    client.force_login(user)
+    results = {}
+    # Repeated writes would only measure the 429 of the rate limits.
+    with override_settings(THROTTLE_RATES={}):
+        for name, method, url, data, setup in items:
+            if only and name not in only:
+                continue
+            results[name] = measure(client, method, url, data, setup,
+                                    iterations, warmup)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """Return a list of regression messages between two result files."""
+    regressions = []
+    for name, new in current['views'].items():
+        old = baseline['views'].get(name)
+        if old is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            if new[metric] > old[metric] * (1 + threshold):
+                regressions.append(
+                    f'{name}: {metric} {old[metric]} -> {new[metric]}'
+                )
+        if new['queries'] > old['queries']:
+            regressions.append(
+                f'{name}: queries {old["queries"]} -> {new["queries"]}'
+            )
+    return regressions
@@ -0,0 +1,99 @@
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+CARD_TEMPLATE = 'includes/post_card.html'
+CARD_TIMEOUT = 60 * 60 * 24
+STATS_KEYS = ('hits', 'misses')
+
+
+def _version_key(kind, pk):
+    return f'posts:card-version:{kind}:{pk}'
+
+
+def _stats_key(name):
+    return f'posts:card-stats:{name}'
+
+
+def bump_version(kind, pk):
+    """Invalidate every cached card that depends on this post or group.
+
+    Versions are fresh timestamps rather than counters, so an evicted
+    version can never come back and match an old card.
+    """
+    cache.set(_version_key(kind, pk), time.time_ns(), None)
+
+
+def _versions(kind, pks):
+    keys = {pk: _version_key(kind, pk) for pk in pks if pk is not None}
+    found = cache.get_many(keys.values())
+    missing = {key: time.time_ns() for key in keys.values()
+               if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {pk: found[key] for pk, key in keys.items()}
+
+
+def _count(name, delta):
+    if delta:
+        cache.add(_stats_key(name), 0, None)
+        cache.incr(_stats_key(name), delta)
+
+
+def card_key(post, post_versions, group_versions):
+    return 'posts:card:{}:{}:{}:{}'.format(
+        post.pk,
+        post_versions[post.pk],
+        post.group_id,
+        group_versions.get(post.group_id),
+    )
+
+
+def _from_primary(posts):
+    """``{pk: post}`` re-read from the primary for posts from a replica.
+
+    A lagging replica may return a post older than its current version,
+    and the card would be cached as current.
+    """
+    pks = [post.pk for post in posts if post._state.db != DEFAULT_DB_ALIAS]
+    if not pks:
+        return {}
+    return Post.objects.using(DEFAULT_DB_ALIAS).for_feed().in_bulk(pks)
+
+
+def render_cards(posts):
+    """Return rendered cards for the posts, reusing cached HTML."""
+    posts = list(posts)
+    post_versions = _versions('post', [post.pk for post in posts])
+    group_versions = _versions('group', {post.group_id for post in posts})
+    keys = [card_key(post, post_versions, group_versions) for post in posts]
+    cached = cache.get_many(keys)
+    primary = _from_primary(
+        [post for post, key in zip(posts, keys) if key not in cached])
+    fresh = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        if key not in cached:
+            post = primary.get(post.pk, post)
+            fresh[key] = render_to_string(CARD_TEMPLATE, {'post': post})
+        cards.append(mark_safe(cached[key] if key in cached else fresh[key]))
+    if fresh:
+        cache.set_many(fresh, CARD_TIMEOUT)
+    _count('hits', len(cached))
+    _count('misses', len(fresh))
+    return cards
+
+
+def stats():
+    values = cache.get_many([_stats_key(name) for name in STATS_KEYS])
+    return {name: values.get(_stats_key(name), 0) for name in STATS_KEYS}
+
+
+def reset_stats():
+    cache.delete_many([_stats_key(name) for name in STATS_KEYS])
@@ -0,0 +1,113 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from core.routers import primary_reads
+
+from .models import Group, Post, User
+
+
+def _version_key(scope):
+    return f'posts:page-version:{scope}'
+
+
+def bump(*scopes):
+    """Invalidate ETags of pages and feeds that depend on these scopes.
+
+    Scopes are 'all', 'post:<pk>', 'group:<pk>', 'author:<pk>' and
+    'groups', the titles and slugs of all groups. A comment bumps its
+    post and the post's author and group, whose pages show the count.
+    Versions are timestamps, like the card versions.
+    """
+    cache.set_many(
+        {_version_key(scope): time.time_ns() for scope in scopes}, None)
+
+
+def versions(*scopes):
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def etag(*parts):
+    state = ':'.join(str(part) for part in parts)
+    return hashlib.md5(state.encode()).hexdigest()
+
+
+def page(etag_func):
+    """Answer 304 when the page's ETag still matches.
+
+    The tag is computed from versions in the cache and one or two
+    indexed queries, before any listing query or template rendering.
+    Browsers are told to revalidate and not to share the page. The tag
+    and the page are read from the primary: the versions are current,
+    and a replica could render older content under them.
+    """
+    def decorator(view):
+        view = condition(etag_func=etag_func)(view)
+        view = cache_control(private=True, no_cache=True)(view)
+        return primary_reads()(vary_on_cookie(view))
+    return decorator
+
+
+def _page_etag(request, *parts):
+    """ETag of an HTML page as seen by this user and session.
+
+    The user and the CSRF cookie are part of the tag: the same URL
+    renders follow buttons, comment forms and CSRF tokens per user.
+    """
+    return etag(
+        request.get_full_path(),
+        request.user.pk,
+        request.META.get('CSRF_COOKIE', ''),
+        *parts,
+    )
+
+
+def post_detail_etag(request, post_id):
+    post = Post.objects.filter(pk=post_id).values(
+        'author_id', 'group_id').first()
+    if post is None:
+        return None
+    return _page_etag(request, *versions(
+        f'post:{post_id}',
+        f'author:{post["author_id"]}',
+        f'group:{post["group_id"]}',
+    ))
+
+
+def _newest(lookup):
+    return Subquery(
+        Post.objects.filter(**{lookup: OuterRef('pk')})
+        .order_by('-pub_date').values('pub_date')[:1]
+    )
+
+
+def group_posts_etag(request, slug):
+    group = Group.objects.filter(slug=slug).values_list(
+        'id', _newest('group')).first()
+    if group is None:
+        return None
+    group_id, newest = group
+    return _page_etag(request, newest, *versions(
+        f'group:{group_id}'))
+
+
+def profile_etag(request, username):
+    author = User.objects.filter(username=username).values_list(
+        'id', _newest('author')).first()
+    if author is None:
+        return None
+    author_id, newest = author
+    # Post cards link to their groups, which can be renamed or deleted.
+    return _page_etag(request, newest, *versions(
+        f'author:{author_id}', 'groups'))
@@ -0,0 +1,161 @@
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import (
+    AuthorStats, Comment, Follow, Group, GroupStats, Post, PostStats
+)
+
+AUTHOR_COUNTERS = {
+    'post_count': (Post, 'author_id'),
+    'follower_count': (Follow, 'author_id'),
+    'following_count': (Follow, 'user_id'),
+}
+GROUP_SUMMARY = {
+    'post_count': Count('id'),
+    'author_count': Count('author', distinct=True),
+    'latest_pub_date': Max('pub_date'),
+}
+EMPTY_GROUP = {'post_count': 0, 'author_count': 0, 'latest_pub_date': None}
+
+
+def recount_author(user_id):
+    stats, _ = AuthorStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            field: model.objects.filter(**{lookup: user_id}).count()
+            for field, (model, lookup) in AUTHOR_COUNTERS.items()
+        },
+    )
+    return stats
+
+
+def author_stats(user_id):
+    stats = AuthorStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        stats = recount_author(user_id)
+    return stats
+
+
+def change_author(user_id, field, delta):
+    """Apply ``delta`` to a counter inside the caller's transaction.
+
+    A missing row is only created on increments: decrements also happen
+    while a user is being deleted, and a row created then would dangle.
+    """
+    updated = AuthorStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta}
+    )
+    if not updated and delta > 0:
+        recount_author(user_id)
+
+
+def change_comments(post_id, delta):
+    PostStats.objects.filter(post_id=post_id).update(
+        comment_count=F('comment_count') + delta
+    )
+
+
+def recount_posts():
+    """Repair comment counters, return the number of drifted posts."""
+    actual = Coalesce(Subquery(
+        Comment.objects.filter(post=OuterRef('pk'))
+        .values('post').annotate(count=Count('id')).values('count')
+    ), 0)
+    posts = Post.objects.annotate(actual=actual).values_list(
+        'id', 'actual', 'stats__comment_count')
+    drifted = [
+        (post_id, count) for post_id, count, stored in posts.iterator()
+        if count != stored
+    ]
+    for post_id, count in drifted:
+        PostStats.objects.update_or_create(
+            post_id=post_id, defaults={'comment_count': count})
+    return len(drifted)
+
+
+def recount_authors(user_ids):
+    """Repair author counters, return the number of drifted authors."""
+    drifted = 0
+    for user_id in user_ids:
+        stored = AuthorStats.objects.filter(user_id=user_id).values(
+            *AUTHOR_COUNTERS).first()
+        stats = recount_author(user_id)
+        if stored != {field: getattr(stats, field)
+                      for field in AUTHOR_COUNTERS}:
+            drifted += 1
+    return drifted
+
+
+def _group_summaries(posts):
+    return {
+        row.pop('group'): row for row in
+        posts.order_by().values('group').annotate(**GROUP_SUMMARY)
+    }
+
+
+def recount_group(group_id):
+    summary = _group_summaries(
+        Post.objects.filter(group_id=group_id)).get(group_id, EMPTY_GROUP)
+    stats, _ = GroupStats.objects.update_or_create(
+        group_id=group_id, defaults=summary)
+    return stats
+
+
+def change_group(group_id, author_id, pub_date, delta):
+    """Account for a post joining (+1) or leaving (-1) a group.
+
+    Runs after the post is saved or deleted, so the author's remaining
+    posts in the group tell whether the author count changes, and the
+    newest post is only looked up again when the newest one leaves.
+    """
+    if group_id is None:
+        return
+    remaining = Post.objects.filter(group_id=group_id, author_id=author_id)
+    if delta > 0:
+        author_delta = int(len(remaining.values_list('id')[:2]) == 1)
+    else:
+        author_delta = -int(not remaining.exists())
+    stats = GroupStats.objects.filter(group_id=group_id)
+    updated = stats.update(post_count=F('post_count') + delta,
+                           author_count=F('author_count') + author_delta)
+    if not updated:
+        if delta > 0:
+            recount_group(group_id)
+        return
+    if delta > 0:
+        stats.filter(
+            Q(latest_pub_date__lt=pub_date) | Q(latest_pub_date__isnull=True)
+        ).update(latest_pub_date=pub_date)
+    else:
+        newest = Post.objects.filter(group_id=group_id).order_by(
+            '-pub_date').values('pub_date')[:1]
+        stats.filter(latest_pub_date__lte=pub_date).update(
+            latest_pub_date=Subquery(newest))
+
+
+def recount_groups(group_ids=None):
+    """Repair group summaries, return the number of drifted groups.
+
+    One grouped query over the posts, then a write per drifted group.
+    Only the groups in ``group_ids`` are checked when it is given.
+    """
+    posts = Post.objects.filter(group__isnull=False)
+    groups = Group.objects.all()
+    summaries = GroupStats.objects.all()
+    if group_ids is not None:
+        posts = posts.filter(group_id__in=group_ids)
+        groups = groups.filter(id__in=group_ids)
+        summaries = summaries.filter(group_id__in=group_ids)
+    actual = _group_summaries(posts)
+    stored = {
+        row.pop('group_id'): row
+        for row in summaries.values('group_id', *GROUP_SUMMARY)
+    }
+    drifted = 0
+    for group_id in groups.values_list('id', flat=True).iterator():
+        summary = actual.get(group_id, EMPTY_GROUP)
+        if stored.get(group_id) != summary:
+            GroupStats.objects.update_or_create(
+                group_id=group_id, defaults=summary)
+            drifted += 1
+    return drifted
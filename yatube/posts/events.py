@@ -0,0 +1,77 @@
+import json
+import time
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from core.pubsub import get_broker
+from .models import TimelineEntry
+
+RETRY_MS = 5000
+
+
+def channel(user_id):
+    return f'posts:new:{user_id}'
+
+
+def new_post(post, follower_ids):
+    """Tell the open streams of every follower about a new post."""
+    message = {'post_id': post.pk, 'author': post.author.username}
+    broker = get_broker()
+    for user_id in follower_ids:
+        broker.publish(channel(user_id), message)
+
+
+def _event(name, event_id, data):
+    payload = json.dumps(data, ensure_ascii=False)
+    return f'id: {event_id}\nevent: {name}\ndata: {payload}\n\n'
+
+
+def _stream(user_id, since):
+    """Yield SSE messages until SSE_STREAM_SECONDS pass.
+
+    The subscription lives only while the generator runs, so a client
+    that disconnects before the first chunk leaves nothing behind. A
+    comment line is sent every SSE_HEARTBEAT_SECONDS, it keeps proxies
+    from closing the connection and reveals clients that went away. The
+    browser reconnects by itself after the stream ends.
+    """
+    deadline = time.monotonic() + settings.SSE_STREAM_SECONDS
+    subscription = get_broker().subscribe(channel(user_id))
+    try:
+        count, last_id = 0, since
+        if since and since.isdigit():
+            count = TimelineEntry.objects.filter(
+                user_id=user_id, post_id__gt=int(since)).count()
+        yield f'retry: {RETRY_MS}\n\n'
+        if count:
+            yield _event('posts', last_id, {'count': count})
+        while time.monotonic() < deadline:
+            messages, dropped = subscription.get(
+                settings.SSE_HEARTBEAT_SECONDS)
+            if not messages:
+                yield ': heartbeat\n\n'
+                continue
+            count += len(messages) + dropped
+            last_id = messages[-1]['post_id']
+            yield _event('posts', last_id, {
+                'count': count, 'author': messages[-1]['author'],
+            })
+    finally:
+        subscription.close()
+
+
+def stream_response(request):
+    """Stream "N new posts" notices for the follow feed of request.user.
+
+    N counts posts newer than ``?since=<post id>`` (or Last-Event-ID on
+    reconnect), so it stays right across reconnects.
+    """
+    since = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get('since')
+    response = StreamingHttpResponse(
+        _stream(request.user.pk, since),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,123 @@
+import json
+from collections import namedtuple
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import conditional
+
+FEED_LENGTH = 20
+FEED_TIMEOUT = 60 * 60
+
+Listing = namedtuple('Listing', 'scope title link description posts')
+
+
+class JsonFeed(feedgenerator.SyndicationFeed):
+    """JSON Feed 1.1 (https://jsonfeed.org/version/1.1)."""
+
+    content_type = 'application/feed+json; charset=utf-8'
+
+    def write(self, outfile, encoding):
+        feed = {
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.feed['title'],
+            'home_page_url': self.feed['link'],
+            'feed_url': self.feed['feed_url'],
+            'description': self.feed['description'],
+            'language': self.feed['language'],
+            'items': [self.item(item) for item in self.items],
+        }
+        outfile.write(json.dumps(feed, ensure_ascii=False))
+
+    def item(self, item):
+        return {
+            'id': item['unique_id'] or item['link'],
+            'url': item['link'],
+            'title': item['title'],
+            'content_text': item['description'],
+            'date_published': item['pubdate'].isoformat(),
+            'authors': [{'name': item['author_name']}],
+        }
+
+
+FEED_TYPES = {
+    'rss': feedgenerator.Rss201rev2Feed,
+    'atom': feedgenerator.Atom1Feed,
+    'json': JsonFeed,
+}
+
+
+class ListingFeed(Feed):
+    """The newest FEED_LENGTH posts of a Listing in one of FEED_TYPES."""
+
+    def __init__(self, feed_type):
+        super().__init__()
+        self.feed_type = feed_type
+
+    def get_object(self, request, listing):
+        return listing
+
+    def title(self, listing):
+        return listing.title
+
+    def link(self, listing):
+        return listing.link
+
+    def description(self, listing):
+        return listing.description
+
+    def items(self, listing):
+        return listing.posts.for_feed()[:FEED_LENGTH]
+
+    def item_title(self, post):
+        return str(post)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=(post.pk,))
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+
+def serve(request, listing, feed_format):
+    """Answer with 304, a cached feed or a freshly rendered one.
+
+    The ETag is derived from the newest pub_date of the listing and its
+    version in ``conditional``, bumped on every Post write, so a
+    conditional request costs a single indexed query.
+    """
+    feed_type = FEED_TYPES.get(feed_format)
+    if feed_type is None:
+        raise Http404
+    newest = listing.posts.order_by('-pub_date').values_list(
+        'pub_date', flat=True).first()
+    last_modified = int(newest.timestamp()) if newest else None
+    digest = conditional.etag(
+        feed_format, newest, *conditional.versions(listing.scope))
+    etag = f'"{digest}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+    key = f'posts:feed:{listing.scope}:{digest}'
+    cached = cache.get(key)
+    if cached is None:
+        rendered = ListingFeed(feed_type)(request, listing)
+        cached = (rendered.content, rendered['Content-Type'])
+        cache.set(key, cached, FEED_TIMEOUT)
+    response = HttpResponse(cached[0], content_type=cached[1])
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,89 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+from sorl.thumbnail import delete, get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 2
+MAX_PENDING = WORKERS * 8
+MAX_DIMENSIONS = (2560, 2560)
+# Must match the {% thumbnail %} calls in the templates.
+RENDITIONS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_PENDING)
+
+
+def _init_worker():
+    django.setup()
+
+
+def normalize(name):
+    """Rotate by EXIF orientation, drop metadata and cap the size."""
+    path = default_storage.path(name)
+    with Image.open(path) as image:
+        if getattr(image, 'is_animated', False):
+            return
+        image_format = image.format
+        clean = ImageOps.exif_transpose(image)
+        clean.thumbnail(MAX_DIMENSIONS)
+        clean.info = {}
+        clean.save(path, format=image_format)
+
+
+def process_upload(name):
+    normalize(name)
+    delete(name, delete_file=False)
+    for geometry, options in RENDITIONS:
+        get_thumbnail(name, geometry, **options)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return _executor
+
+
+def _done(future):
+    _slots.release()
+    if future.exception() is not None:
+        logger.error('Image processing failed', exc_info=future.exception())
+
+
+def _submit(name):
+    if not _slots.acquire(blocking=False):
+        logger.warning('Image pipeline is full, %s is left as uploaded', name)
+        return
+    try:
+        future = _get_executor().submit(process_upload, name)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(_done)
+
+
+def schedule(image):
+    """Process an uploaded image once the post that owns it is committed.
+
+    The work runs on a bounded pool of worker processes, so the request
+    never waits for it. When the pool is saturated the image is kept as
+    uploaded and sorl renders renditions lazily, as before.
+    """
+    if image:
+        transaction.on_commit(lambda: _submit(image.name))
@@ -0,0 +1,79 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every posts view in-process against a throwaway '
+        'database, or compare two result files.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=3,
+                            help='Comments per post.')
+        parser.add_argument('--follows', type=int, default=10,
+                            help='Followed authors per user.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', nargs='+',
+                            help='Only run these scenarios.')
+        parser.add_argument('--output', default='bench.json',
+                            help='Where to write the JSON results.')
+        parser.add_argument('--compare', nargs=2,
+                            metavar=('BASELINE', 'CURRENT'),
+                            help='Compare two result files instead.')
+        parser.add_argument('--threshold', type=float, default=0.1,
+                            help='Allowed latency growth for --compare.')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(*options['compare'], options['threshold'])
+        size = {name: options[name] for name in
+                ('users', 'groups', 'posts', 'comments', 'follows', 'seed')}
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True)
+        try:
+            benchmarks.populate(**size)
+            views = benchmarks.run(
+                options['iterations'], options['warmup'], options['only'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        report = {
+            'environment': benchmarks.environment(),
+            'size': size,
+            'iterations': options['iterations'],
+            'views': views,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        self.print_table(views)
+        self.stdout.write(f'Results written to {options["output"]}')
+
+    def print_table(self, views):
+        self.stdout.write(
+            f'{"view":<18}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+            f'{"queries":>9}{"alloc KiB":>11}'
+        )
+        for name, row in views.items():
+            self.stdout.write(
+                f'{name:<18}{row["p50_ms"]:>10}{row["p95_ms"]:>10}'
+                f'{row["p99_ms"]:>10}{row["queries"]:>9}'
+                f'{row["alloc_peak_kib"]:>11}'
+            )
+
+    def compare(self, baseline_path, current_path, threshold):
+        with open(baseline_path) as baseline, open(current_path) as current:
+            regressions = benchmarks.compare(
+                json.load(baseline), json.load(current), threshold)
+        if regressions:
+            raise CommandError(
+                'Regressions found:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import cards
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of the post card fragment cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Reset the counters after printing them.'
+        )
+
+    def handle(self, *args, **options):
+        stats = cards.stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f'hits={stats["hits"]} misses={stats["misses"]} '
+            f'hit_ratio={ratio:.2%}'
+        )
+        if options['reset']:
+            cards.reset_stats()
@@ -0,0 +1,53 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream groups, posts, comments and follows as JSON Lines. '
+        'Image files are referenced by name, copy MEDIA_ROOT separately.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-',
+                            help='File to write, "-" for stdout.')
+        parser.add_argument('--chunk-size', type=int,
+                            default=transfer.EXPORT_CHUNK_SIZE)
+        parser.add_argument('--resume', action='store_true',
+                            help='Append to OUTPUT after its last record.')
+        parser.add_argument('--progress', type=int, default=10000,
+                            help='Report progress every N records.')
+
+    def handle(self, *args, **options):
+        path = options['output']
+        after = None
+        if options['resume']:
+            if path == '-':
+                raise CommandError('--resume needs an output file.')
+            try:
+                after = transfer.last_record(path)
+            except FileNotFoundError:
+                after = None
+        if path == '-':
+            output = sys.stdout
+        else:
+            output = open(path, 'a' if after else 'w', encoding='utf-8')
+        written = 0
+        try:
+            for kind, record in transfer.export_records(
+                    after, options['chunk_size']):
+                output.write(transfer.dump(kind, record) + '\n')
+                written += 1
+                if written % options['progress'] == 0:
+                    self.stderr.write(f'{written} records, at {kind} '
+                                      f'{record["id"]}')
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {written} records'
+            + (f' after {after[0]} {after[1]}.' if after else '.')
+        ))
@@ -0,0 +1,75 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Load a JSON Lines file written by export_posts with batched '
+        'bulk inserts. Progress is checkpointed, --resume skips the '
+        'lines that are already committed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='File written by export_posts.')
+        parser.add_argument('--batch-size', type=int,
+                            default=transfer.IMPORT_BATCH_SIZE)
+        parser.add_argument('--media-from',
+                            help='MEDIA_ROOT of the source site, image files '
+                                 'are copied from there.')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue from the last checkpoint.')
+        parser.add_argument('--progress', type=int, default=10000,
+                            help='Report progress every N lines.')
+
+    def handle(self, *args, **options):
+        path = options['input']
+        checkpoint = path + '.checkpoint'
+        skip, state = 0, {}
+        if options['resume'] and os.path.exists(checkpoint):
+            skip, state = self.load_checkpoint(checkpoint)
+        importer = transfer.Importer(
+            options['batch_size'], options['media_from'], state)
+        line_number = 0
+        with open(path, encoding='utf-8') as stream:
+            for line_number, line in enumerate(stream, 1):
+                if line_number <= skip or not line.strip():
+                    continue
+                try:
+                    flushed = importer.add(json.loads(line))
+                except ValueError as error:
+                    raise CommandError(f'{path}:{line_number}: {error}')
+                if flushed:
+                    self.save_checkpoint(
+                        checkpoint, line_number - len(importer.batch),
+                        importer.state())
+                if line_number % options['progress'] == 0:
+                    self.stderr.write(f'{line_number} lines')
+        importer.finish(everything=state is None)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        loaded = ', '.join(
+            f'{count} {kind}s' for kind, count in importer.loaded.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {loaded}'
+            + (f' after skipping {skip} lines.' if skip else '.')
+        ))
+
+    def load_checkpoint(self, path):
+        """Return the committed line count and the importer state.
+
+        Checkpoints of older versions hold just the line number, the
+        state is None then.
+        """
+        with open(path) as stream:
+            checkpoint = json.loads(stream.read() or '0')
+        if isinstance(checkpoint, int):
+            return checkpoint, None
+        return checkpoint.pop('line'), checkpoint
+
+    def save_checkpoint(self, path, line_number, state):
+        with open(path, 'w') as stream:
+            json.dump({'line': line_number, **state}, stream)
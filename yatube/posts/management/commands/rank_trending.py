@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Rank recent posts by comment velocity and reach and store the top '
+        'for the popular page. Meant to run every few minutes from cron.'
+    )
+
+    def handle(self, *args, **options):
+        count = trending.rank()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ranked {count} posts (top {trending.TOP_K} of the last '
+            f'{trending.WINDOW.days} days).'
+        ))
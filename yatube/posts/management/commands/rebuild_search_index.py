@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of posts from posts_post.'
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            raise CommandError('Full-text index is only kept on SQLite.')
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
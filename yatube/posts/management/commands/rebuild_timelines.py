@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the materialized follow timelines from Follow and Post. '
+        'Run with --trim from cron to cap timelines that grew past '
+        'TIMELINE_LENGTH.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Only rebuild timelines of these users.'
+        )
+        parser.add_argument(
+            '--trim', action='store_true',
+            help='Only cap every timeline at TIMELINE_LENGTH entries.'
+        )
+
+    def handle(self, *args, **options):
+        if options['trim']:
+            deleted = timeline.trim_all()
+            self.stdout.write(self.style.SUCCESS(
+                f'Trimmed {deleted} entries beyond '
+                f'{timeline.TIMELINE_LENGTH} posts.'
+            ))
+            return
+        users = User.objects.all()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        count = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            timeline.rebuild(user_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} timelines '
+            f'(up to {timeline.TIMELINE_LENGTH} posts each).'
+        ))
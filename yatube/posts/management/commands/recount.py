@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute denormalized post, comment and follower counters and '
+        'the group directory summaries.'
+    )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        posts = counters.recount_posts()
+        user_ids = list(User.objects.values_list('id', flat=True))
+        authors = counters.recount_authors(user_ids)
+        groups = counters.recount_groups()
+        self.stdout.write(self.style.SUCCESS(
+            f'Fixed {posts} post and {authors} author counters '
+            f'and {groups} group summaries.'
+        ))
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Post = apps.get_model('posts', 'Post')
+    PostStats = apps.get_model('posts', 'PostStats')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    PostStats.objects.bulk_create(
+        PostStats(post_id=post_id, comment_count=count)
+        for post_id, count in Post.objects.annotate(
+            count=Count('comments')).values_list('id', 'count')
+    )
+    AuthorStats.objects.bulk_create(
+        AuthorStats(
+            user=user,
+            post_count=user.posts.count(),
+            follower_count=user.following.count(),
+            following_count=user.follower.count(),
+        )
+        for user in User.objects.all()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0002_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='author_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('follower_count', models.PositiveIntegerField(default=0)),
+                ('following_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PostStats',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Post')),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
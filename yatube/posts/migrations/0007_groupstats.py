@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Max
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    GroupStats.objects.bulk_create(
+        GroupStats(group_id=group_id, post_count=posts,
+                   author_count=authors, latest_pub_date=latest)
+        for group_id, posts, authors, latest in Group.objects.annotate(
+            post_total=Count('posts'),
+            author_total=Count('posts__author', distinct=True),
+            latest=Max('posts__pub_date'),
+        ).values_list('id', 'post_total', 'author_total', 'latest')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_trendingpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('author_count', models.PositiveIntegerField(default=0)),
+                ('latest_pub_date', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
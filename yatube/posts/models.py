@@ -4,6 +4,11 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 SYMBOLS_LIMIT = 15
+FEED_FIELDS = (
+    'id', 'text', 'pub_date', 'image',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
 
 
 class Group(models.Model):
@@ -15,6 +20,14 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Load exactly what a post card needs, in one query."""
+        return self.select_related('author', 'group', 'stats').only(
+            *FEED_FIELDS, 'author', 'group', 'stats__comment_count'
+        )
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='content', help_text='just text')
     pub_date = models.DateTimeField(verbose_name='date', auto_now_add=True)
@@ -35,11 +48,21 @@ class Post(models.Model):
         blank=True
     )
 
+    objects = PostQuerySet.as_manager()
+
     def __str__(self):
         return self.text[:SYMBOLS_LIMIT]
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -55,6 +78,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return self.text[50]
@@ -67,3 +94,72 @@ class Follow(models.Model):
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
                                related_name='following')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='timeline_entries')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pub_date', '-post_id']
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+
+
+class PostStats(models.Model):
+    post = models.OneToOneField(Post,
+                                primary_key=True,
+                                on_delete=models.CASCADE,
+                                related_name='stats')
+    comment_count = models.PositiveIntegerField(default=0)
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(User,
+                                primary_key=True,
+                                on_delete=models.CASCADE,
+                                related_name='author_stats')
+    post_count = models.PositiveIntegerField(default=0)
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+
+class TrendingPost(models.Model):
+    """Precomputed top of the popular page, see posts.trending."""
+    post = models.OneToOneField(Post,
+                                primary_key=True,
+                                on_delete=models.CASCADE,
+                                related_name='trending')
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['rank']
+
+
+class GroupStats(models.Model):
+    """Summary row of the group directory, kept by posts.counters."""
+    group = models.OneToOneField(Group,
+                                 primary_key=True,
+                                 on_delete=models.CASCADE,
+                                 related_name='stats')
+    post_count = models.PositiveIntegerField(default=0)
+    author_count = models.PositiveIntegerField(default=0)
+    latest_pub_date = models.DateTimeField(null=True, blank=True)
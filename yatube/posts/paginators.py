@@ -0,0 +1,216 @@
+import base64
+import binascii
+
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+POST_QUANTITY = 10
+CURSOR_PARAMS = ('after', 'before')
+POST_ORDERING = ('pub_date', 'id')
+COMMENT_QUANTITY = 20
+GROUP_QUANTITY = 50
+COMMENT_ORDERING = ('created', 'id')
+TRENDING_ORDERING = ('rank', 'id')
+COUNT_TIMEOUT = 60 * 5
+PAGE_WINDOW = 3
+ELLIPSIS = '…'
+# SQLite integers are signed 64-bit; larger ids cannot even be bound.
+MAX_ID = 2 ** 63 - 1
+
+
+def count_key(*parts):
+    return 'posts:count:' + ':'.join(str(part) for part in parts)
+
+
+def forget_counts(*keys):
+    cache.delete_many([key for key in keys if key is not None])
+
+
+def encode_cursor(values):
+    raw = '|'.join(
+        value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        for value in values
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def parse_id(value):
+    number = int(value)
+    if abs(number) > MAX_ID:
+        raise ValueError(f'Id out of range: {value}')
+    return number
+
+
+def decode_cursor(token, converters=(parse_datetime, parse_id)):
+    """Return the key values of a token or None if it is garbage."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded).decode().split('|')
+        if len(raw) != len(converters):
+            return None
+        values = tuple(
+            convert(value) for convert, value in zip(converters, raw)
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if None in values:
+        return None
+    return values
+
+
+class CursorPage(Page):
+    """Page that also links to its neighbours with cursor tokens.
+
+    Cursors are taken from the first and the last object, so the object
+    list is evaluated as soon as the page is built. Objects are model
+    instances or ``values()`` dicts.
+    """
+
+    def __init__(self, object_list, number, paginator,
+                 has_next=None, has_previous=None):
+        object_list = list(object_list)
+        super().__init__(object_list, number, paginator)
+        self.is_cursor = number is None
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = self._cursor_for(object_list[-1:])
+        self.previous_cursor = self._cursor_for(object_list[:1])
+
+    def _cursor_for(self, objects):
+        if not objects:
+            return None
+        obj = objects[0]
+        if isinstance(obj, dict):
+            return encode_cursor(
+                obj[field] for field in self.paginator.ordering)
+        return encode_cursor(
+            getattr(obj, field) for field in self.paginator.ordering
+        )
+
+    @cached_property
+    def page_window(self):
+        if self.number is None:
+            return []
+        return list(self.paginator.get_elided_page_range(self.number))
+
+    def has_next(self):
+        if self._has_next is not None:
+            return self._has_next
+        return super().has_next()
+
+    def has_previous(self):
+        if self._has_previous is not None:
+            return self._has_previous
+        return super().has_previous()
+
+
+class CursorPaginator(Paginator):
+    """Paginator with an extra keyset (cursor) mode.
+
+    Page numbers keep working as with the stock Paginator, while
+    ``get_cursor_page`` seeks by ``(pub_date, id)`` without OFFSET, so a
+    deep page costs the same as the first one. ``ordering`` names the two
+    key fields, both sorted descending unless ``descending`` is False.
+
+    The row count behind ``num_pages`` is taken from ``count`` when the
+    caller already knows it, or kept in the cache under ``count_key``
+    for COUNT_TIMEOUT seconds; writes drop it with ``forget_counts``.
+    """
+
+    ELLIPSIS = ELLIPSIS
+
+    def __init__(self, object_list, per_page, ordering=POST_ORDERING,
+                 count=None, count_key=None, descending=True, **kwargs):
+        self.ordering = ordering
+        self.known_count = count
+        self.count_key = count_key
+        self.descending = descending
+        prefix = '-' if descending else ''
+        object_list = object_list.order_by(
+            *(prefix + field for field in ordering)
+        )
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        if self.count_key is None:
+            return Paginator.count.func(self)
+        return cache.get_or_set(
+            self.count_key, lambda: Paginator.count.func(self),
+            COUNT_TIMEOUT
+        )
+
+    def get_elided_page_range(self, number=1, on_each_side=PAGE_WINDOW,
+                              on_ends=1):
+        """Yield the first, last and neighbouring page numbers.
+
+        Gaps are marked with ``ELLIPSIS``, so the template renders a fixed
+        number of links however many pages there are.
+        """
+        number = self.validate_number(number)
+        num_pages = self.num_pages
+        if num_pages <= (on_each_side + on_ends) * 2 + 1:
+            yield from self.page_range
+            return
+        if number > on_each_side + on_ends + 2:
+            yield from range(1, on_ends + 1)
+            yield ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield ELLIPSIS
+            yield from range(num_pages - on_ends + 1, num_pages + 1)
+        else:
+            yield from range(number + 1, num_pages + 1)
+
+    def _get_page(self, *args, **kwargs):
+        return CursorPage(*args, **kwargs)
+
+    def _seek(self, cursor, direction):
+        date_field, pk_field = self.ordering
+        date, pk = cursor
+        if not self.descending:
+            direction = {'lt': 'gt', 'gt': 'lt'}[direction]
+        return self.object_list.filter(
+            Q(**{f'{date_field}__{direction}': date})
+            | Q(**{date_field: date, f'{pk_field}__{direction}': pk})
+        )
+
+    def get_cursor_page(self, after=None, before=None):
+        after, before = decode_cursor(after), decode_cursor(before)
+        if before is not None:
+            rows = list(
+                self._seek(before, 'gt').reverse()[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return self._get_page(rows, None, self,
+                                  has_next=True, has_previous=has_previous)
+        queryset = self.object_list
+        if after is not None:
+            queryset = self._seek(after, 'lt')
+        rows = list(queryset[:self.per_page + 1])
+        return self._get_page(rows[:self.per_page], None, self,
+                              has_next=len(rows) > self.per_page,
+                              has_previous=after is not None)
+
+
+def get_page(request, queryset, ordering=POST_ORDERING, count=None,
+             count_key=None):
+    paginator = CursorPaginator(queryset, POST_QUANTITY, ordering=ordering,
+                                count=count, count_key=count_key)
+    if any(param in request.GET for param in CURSOR_PARAMS):
+        return paginator.get_cursor_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    return paginator.get_page(request.GET.get('page'))
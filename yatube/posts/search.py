@@ -0,0 +1,132 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .paginators import POST_QUANTITY, CursorPage, decode_cursor, parse_id
+
+FTS_TABLE = 'posts_post_fts'
+SEARCH_ORDERING = ('search_rank', 'id')
+CURSOR_CONVERTERS = (float, parse_id)
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def split_terms(query):
+    return re.findall(r'\w+', query)
+
+
+def build_match(terms):
+    """Quote every term, so user input cannot break FTS5 query syntax."""
+    return ' '.join('"{}"'.format(term) for term in terms)
+
+
+def matching_ids(match):
+    return RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,)
+    )
+
+
+def rebuild():
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+
+
+class SearchPaginator:
+    """Cursor paginator over bm25-ranked full-text matches.
+
+    The rank comes from the FTS5 index, so it cannot be expressed through
+    the ORM: the page of ids is fetched with raw SQL and the posts are then
+    loaded with ``for_feed()``. Without FTS5 it falls back to unranked
+    ``icontains`` filters ordered by id.
+    """
+
+    ordering = SEARCH_ORDERING
+
+    def __init__(self, query, group=None, author=None,
+                 per_page=POST_QUANTITY):
+        self.terms = split_terms(query)
+        self.match = build_match(self.terms)
+        self.group = group
+        self.author = author
+        self.per_page = per_page
+
+    def _filters(self):
+        sql, params = [], []
+        if self.group is not None:
+            sql.append('post.group_id = %s')
+            params.append(self.group.pk)
+        if self.author is not None:
+            sql.append('post.author_id = %s')
+            params.append(self.author.pk)
+        return sql, params
+
+    def _ranked_ids(self, cursor, backwards):
+        where, params = self._filters()
+        if cursor is not None:
+            op = '<' if backwards else '>'
+            where.append(
+                f'(search_rank {op} %s '
+                f'OR (search_rank = %s AND post.id {op} %s))'
+            )
+            params.extend([cursor[0], cursor[0], cursor[1]])
+        direction = 'DESC' if backwards else 'ASC'
+        sql = (
+            f'SELECT post.id, bm25({FTS_TABLE}) AS search_rank '
+            f'FROM {FTS_TABLE} JOIN posts_post post '
+            f'ON post.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s '
+            + ''.join(f'AND {condition} ' for condition in where)
+            + f'ORDER BY search_rank {direction}, post.id {direction} '
+            f'LIMIT %s'
+        )
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(
+                sql, [self.match, *params, self.per_page + 1])
+            return db_cursor.fetchall()
+
+    def _fallback_rows(self, cursor, backwards):
+        posts = Post.objects.order_by('-id' if backwards else 'id')
+        for term in self.terms:
+            posts = posts.filter(text__icontains=term)
+        if self.group is not None:
+            posts = posts.filter(group=self.group)
+        if self.author is not None:
+            posts = posts.filter(author=self.author)
+        if cursor is not None:
+            lookup = 'id__lt' if backwards else 'id__gt'
+            posts = posts.filter(**{lookup: cursor[1]})
+        ids = posts.values_list('id', flat=True)[:self.per_page + 1]
+        return [(pk, 0.0) for pk in ids]
+
+    def get_cursor_page(self, after=None, before=None):
+        after = decode_cursor(after, CURSOR_CONVERTERS)
+        before = decode_cursor(before, CURSOR_CONVERTERS)
+        if not self.match:
+            rows = []
+        elif not fts_enabled():
+            rows = self._fallback_rows(before or after, before is not None)
+        else:
+            rows = self._ranked_ids(before or after, before is not None)
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before is not None:
+            rows.reverse()
+        posts = Post.objects.for_feed().in_bulk([pk for pk, _ in rows])
+        object_list = []
+        for pk, rank in rows:
+            if pk in posts:
+                posts[pk].search_rank = rank
+                object_list.append(posts[pk])
+        if before is not None:
+            return CursorPage(object_list, None, self,
+                              has_next=True, has_previous=more)
+        return CursorPage(object_list, None, self,
+                          has_next=more, has_previous=after is not None)
@@ -0,0 +1,147 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cards, conditional, counters, events, following, timeline
+from .models import Comment, Follow, Group, GroupStats, Post, PostStats
+from .paginators import count_key, forget_counts
+
+CARD_GROUP_FIELDS = ('title', 'slug')
+
+
+def _group_count_key(group_id):
+    if group_id is None:
+        return None
+    return count_key('group', group_id)
+
+
+def _page_scopes(post, old_group_id=None):
+    scopes = ['all', f'post:{post.pk}', f'author:{post.author_id}']
+    for group_id in {post.group_id, old_group_id} - {None}:
+        scopes.append(f'group:{group_id}')
+    return scopes
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, **kwargs):
+    instance._old_group_id = None
+    if instance.pk is not None:
+        instance._old_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    cards.bump_version('post', instance.pk)
+    old_group_id = getattr(instance, '_old_group_id', None)
+    conditional.bump(*_page_scopes(instance, old_group_id))
+    if not created and old_group_id != instance.group_id:
+        forget_counts(_group_count_key(old_group_id),
+                      _group_count_key(instance.group_id))
+        counters.change_group(old_group_id, instance.author_id,
+                              instance.pub_date, -1)
+        counters.change_group(instance.group_id, instance.author_id,
+                              instance.pub_date, 1)
+    if created:
+        forget_counts(count_key('all'), _group_count_key(instance.group_id))
+        PostStats.objects.create(post=instance)
+        counters.change_author(instance.author_id, 'post_count', 1)
+        counters.change_group(instance.group_id, instance.author_id,
+                              instance.pub_date, 1)
+        follower_ids = timeline.fan_out(instance)
+        transaction.on_commit(
+            lambda: events.new_post(instance, follower_ids))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    cards.bump_version('post', instance.pk)
+    conditional.bump(*_page_scopes(instance))
+    forget_counts(count_key('all'), _group_count_key(instance.group_id))
+    counters.change_author(instance.author_id, 'post_count', -1)
+    counters.change_group(instance.group_id, instance.author_id,
+                          instance.pub_date, -1)
+
+
+def _comment_scopes(comment):
+    scopes = [f'post:{comment.post_id}']
+    post = Post.objects.filter(pk=comment.post_id).values(
+        'author_id', 'group_id').first()
+    if post is not None:
+        scopes.append(f'author:{post["author_id"]}')
+        if post['group_id'] is not None:
+            scopes.append(f'group:{post["group_id"]}')
+    return scopes
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments(instance.post_id, 1)
+        cards.bump_version('post', instance.post_id)
+        conditional.bump(*_comment_scopes(instance))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments(instance.post_id, -1)
+    cards.bump_version('post', instance.post_id)
+    conditional.bump(*_comment_scopes(instance))
+
+
+@receiver(pre_save, sender=Group)
+def group_changing(sender, instance, **kwargs):
+    old = None
+    if instance.pk is not None:
+        old = Group.objects.filter(pk=instance.pk).values(
+            *CARD_GROUP_FIELDS).first()
+    instance._card_fields_changed = old is None or any(
+        getattr(instance, field) != old[field] for field in CARD_GROUP_FIELDS
+    )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.create(group=instance)
+    scopes = [f'group:{instance.pk}']
+    if getattr(instance, '_card_fields_changed', True):
+        cards.bump_version('group', instance.pk)
+        scopes.append('groups')
+    conditional.bump(*scopes)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    cards.bump_version('group', instance.pk)
+    conditional.bump(f'group:{instance.pk}', 'groups')
+
+
+def _forget_following(user_id):
+    """Drop the cached set now and again once the change is visible.
+
+    A concurrent request may cache the old set between the two.
+    """
+    following.forget(user_id)
+    transaction.on_commit(lambda: following.forget(user_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author(instance.author_id, 'follower_count', 1)
+        counters.change_author(instance.user_id, 'following_count', 1)
+        conditional.bump(f'author:{instance.author_id}',
+                         f'author:{instance.user_id}')
+        timeline.backfill(instance.user_id, instance.author_id)
+        _forget_following(instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_author(instance.author_id, 'follower_count', -1)
+    counters.change_author(instance.user_id, 'following_count', -1)
+    conditional.bump(f'author:{instance.author_id}',
+                     f'author:{instance.user_id}')
+    timeline.drop_author(instance.user_id, instance.author_id)
+    _forget_following(instance.user_id)
@@ -0,0 +1,29 @@
+from django.test import TestCase
+
+from .. import benchmarks
+
+
+class BenchmarkTests(TestCase):
+    def test_run_reports_every_scenario(self):
+        benchmarks.populate(users=5, groups=2, posts=30, comments=1,
+                            follows=2)
+        results = benchmarks.run(iterations=2, warmup=0)
+        self.assertIn('follow_index', results)
+        self.assertIn('add_comment', results)
+        for name, row in results.items():
+            with self.subTest(name=name):
+                self.assertIn(row['status'], (200, 302))
+                self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+                self.assertGreater(row['queries'], 0)
+
+    def test_compare_flags_regressions(self):
+        row = {'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 30, 'queries': 4}
+        slower = dict(row, p95_ms=30, queries=5)
+        regressions = benchmarks.compare(
+            {'views': {'index': row}}, {'views': {'index': slower}})
+        self.assertEqual(regressions, [
+            'index: p95_ms 20 -> 30',
+            'index: queries 4 -> 5',
+        ])
+        self.assertEqual(benchmarks.compare(
+            {'views': {'index': row}}, {'views': {'index': row}}), [])
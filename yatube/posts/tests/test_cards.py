@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import cards
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.group = Group.objects.create(
+            title='group',
+            slug='group_1'
+        )
+        self.post = Post.objects.create(
+            text='cached text',
+            author=self.user,
+            group=self.group
+        )
+
+    def test_second_render_hits_cache(self):
+        self.guest_client.get(reverse('posts:main_posts'))
+        self.guest_client.get(reverse('posts:main_posts'))
+        self.assertEqual(cards.stats(), {'hits': 1, 'misses': 1})
+
+    def test_post_save_invalidates_card(self):
+        self.guest_client.get(reverse('posts:main_posts'))
+        self.post.text = 'edited text'
+        self.post.save()
+        response = self.guest_client.get(reverse('posts:main_posts'))
+        self.assertContains(response, 'edited text')
+        self.assertNotContains(response, 'cached text')
+
+    def test_group_slug_change_invalidates_card(self):
+        self.guest_client.get(reverse('posts:main_posts'))
+        self.group.slug = 'group_2'
+        self.group.save()
+        response = self.guest_client.get(reverse('posts:main_posts'))
+        self.assertContains(
+            response, reverse('posts:group_list', args=('group_2',)))
+
+    def test_group_description_change_keeps_card(self):
+        self.guest_client.get(reverse('posts:main_posts'))
+        self.group.description = 'new description'
+        self.group.save()
+        self.guest_client.get(reverse('posts:main_posts'))
+        self.assertEqual(cards.stats()['hits'], 1)
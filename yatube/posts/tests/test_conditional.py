@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='group', slug='group_1', description='description')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.post = Post.objects.create(
+            text='text', author=self.user, group=self.group)
+        self.pages = {
+            'post_detail': reverse('posts:post_detail', args=(self.post.pk,)),
+            'group_list': reverse('posts:group_list', args=(self.group.slug,)),
+            'profile': reverse('posts:profile', args=(self.user.username,)),
+        }
+
+    def test_unchanged_pages_are_not_modified(self):
+        for name, address in self.pages.items():
+            with self.subTest(page=name):
+                etag = self.guest_client.get(address)['ETag']
+                with self.assertNumQueries(1):
+                    response = self.guest_client.get(
+                        address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertIn('private', response['Cache-Control'])
+
+    def test_missing_objects_are_still_404(self):
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=(self.post.pk + 1,)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_users_get_their_own_etag(self):
+        address = self.pages['profile']
+        guest = self.guest_client.get(address)['ETag']
+        reader = self.reader_client.get(address)['ETag']
+        self.assertNotEqual(guest, reader)
+        response = self.reader_client.get(address, HTTP_IF_NONE_MATCH=guest)
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_invalidate_pages(self):
+        changes = {
+            'post_detail': lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='comment'),
+            'group_list': lambda: Post.objects.create(
+                text='new', author=self.reader, group=self.group),
+            'profile': lambda: Follow.objects.create(
+                user=self.reader, author=self.user),
+        }
+        for name, change in changes.items():
+            with self.subTest(page=name):
+                address = self.pages[name]
+                etag = self.reader_client.get(address)['ETag']
+                change()
+                response = self.reader_client.get(
+                    address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_group_rename_invalidates_post_detail(self):
+        address = self.pages['post_detail']
+        etag = self.guest_client.get(address)['ETag']
+        self.group.title = 'renamed'
+        self.group.save()
+        response = self.guest_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'renamed')
+
+    def test_group_changes_invalidate_profile(self):
+        group = Group.objects.create(title='other', slug='other_1')
+        Post.objects.create(text='other', author=self.user, group=group)
+
+        def change_slug():
+            group.slug = 'other_2'
+            group.save()
+
+        changes = {'slug': change_slug, 'delete': group.delete}
+        address = self.pages['profile']
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                etag = self.guest_client.get(address)['ETag']
+                change()
+                response = self.guest_client.get(
+                    address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, 'other_1')
+
+    def test_comments_only_invalidate_their_own_pages(self):
+        other = Post.objects.create(text='other', author=self.reader)
+        etags = {name: self.guest_client.get(address)['ETag']
+                 for name, address in self.pages.items()}
+        Comment.objects.create(post=other, author=self.user, text='comment')
+        for name, address in self.pages.items():
+            with self.subTest(page=name):
+                response = self.guest_client.get(
+                    address, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 304)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='comment')
+        for name, address in self.pages.items():
+            with self.subTest(page=name):
+                response = self.guest_client.get(
+                    address, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
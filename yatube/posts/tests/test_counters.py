@@ -0,0 +1,153 @@
+import datetime
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import (
+    AuthorStats, Comment, Follow, Group, GroupStats, Post, PostStats
+)
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+
+    def setUp(self):
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+        self.post = Post.objects.create(text='text', author=self.user)
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_post_count_follows_create_and_delete(self):
+        Post.objects.create(text='text 2', author=self.user)
+        self.assertEqual(self.stats(self.user).post_count, 2)
+        self.post.delete()
+        self.assertEqual(self.stats(self.user).post_count, 1)
+
+    def test_comment_count_follows_add_comment(self):
+        self.follower_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': 'comment'})
+        self.assertEqual(
+            PostStats.objects.get(post=self.post).comment_count, 1)
+        Comment.objects.get(post=self.post).delete()
+        self.assertEqual(
+            PostStats.objects.get(post=self.post).comment_count, 0)
+
+    def test_follow_counters(self):
+        self.follower_client.get(
+            reverse('posts:profile_follow', args=(self.user,)))
+        self.assertEqual(self.stats(self.user).follower_count, 1)
+        self.assertEqual(self.stats(self.follower).following_count, 1)
+        self.follower_client.get(
+            reverse('posts:profile_unfollow', args=(self.user,)))
+        self.assertEqual(self.stats(self.user).follower_count, 0)
+        self.assertEqual(self.stats(self.follower).following_count, 0)
+
+    def test_profile_uses_counter(self):
+        response = self.follower_client.get(
+            reverse('posts:profile', args=(self.user,)))
+        self.assertEqual(response.context['total_num_posts'], 1)
+
+    def test_recount_repairs_drift(self):
+        Follow.objects.create(user=self.follower, author=self.user)
+        AuthorStats.objects.filter(user=self.user).update(
+            post_count=7, follower_count=0)
+        PostStats.objects.filter(post=self.post).update(comment_count=3)
+        out = io.StringIO()
+        call_command('recount', stdout=out)
+        self.assertIn('Fixed 1 post and 1 author counters', out.getvalue())
+        self.assertEqual(self.stats(self.user).post_count, 1)
+        self.assertEqual(self.stats(self.user).follower_count, 1)
+        self.assertEqual(
+            PostStats.objects.get(post=self.post).comment_count, 0)
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='')
+
+    def summary(self, group=None):
+        return GroupStats.objects.values(
+            'post_count', 'author_count', 'latest_pub_date').get(
+            group=group or self.group)
+
+    def test_summary_follows_post_writes(self):
+        self.assertEqual(self.summary(), {
+            'post_count': 0, 'author_count': 0, 'latest_pub_date': None})
+        first = Post.objects.create(
+            text='1', author=self.user, group=self.group)
+        Post.objects.create(text='2', author=self.user, group=self.group)
+        last = Post.objects.create(
+            text='3', author=self.other, group=self.group)
+        self.assertEqual(self.summary(), {
+            'post_count': 3, 'author_count': 2,
+            'latest_pub_date': last.pub_date})
+        last.delete()
+        self.assertEqual(self.summary(), {
+            'post_count': 2, 'author_count': 1,
+            'latest_pub_date': Post.objects.latest('pub_date').pub_date})
+        first.delete()
+        self.assertEqual(self.summary()['author_count'], 1)
+
+    def test_moving_a_post_updates_both_groups(self):
+        other_group = Group.objects.create(
+            title='Другая', slug='other', description='')
+        post = Post.objects.create(
+            text='text', author=self.user, group=self.group)
+        post.group = other_group
+        post.save()
+        self.assertEqual(self.summary(), {
+            'post_count': 0, 'author_count': 0, 'latest_pub_date': None})
+        self.assertEqual(self.summary(other_group)['post_count'], 1)
+
+    def test_deleted_group_leaves_no_summary(self):
+        post = Post.objects.create(
+            text='text', author=self.user, group=self.group)
+        self.group.delete()
+        post.refresh_from_db()
+        self.assertIsNone(post.group_id)
+        self.assertFalse(GroupStats.objects.exists())
+
+    def test_recount_rebuilds_summaries(self):
+        Post.objects.create(text='text', author=self.user, group=self.group)
+        GroupStats.objects.all().delete()
+        out = io.StringIO()
+        call_command('recount', stdout=out)
+        self.assertIn('and 1 group summaries', out.getvalue())
+        self.assertEqual(self.summary()['post_count'], 1)
+
+    def test_directory_reads_summaries(self):
+        busy = Group.objects.create(title='Б', slug='busy', description='')
+        Post.objects.create(text='text', author=self.user, group=busy)
+        GroupStats.objects.filter(group=busy).update(
+            latest_pub_date=datetime.datetime(
+                2020, 1, 1, tzinfo=datetime.timezone.utc))
+        address = reverse('posts:group_index')
+        with self.assertNumQueries(2):
+            response = Client().get(address)
+        self.assertEqual(
+            [group.slug for group in response.context['page_obj']],
+            ['busy', 'group'])
+        response = Client().get(address, {'sort': 'title'})
+        self.assertEqual(
+            [group.slug for group in response.context['page_obj']],
+            ['busy', 'group'])
+        self.assertContains(response, '01 января 2020')
@@ -0,0 +1,82 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.pubsub import get_broker
+from .. import events as post_events
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+def events(response, count):
+    """Read ``count`` non-comment messages from an SSE response."""
+    messages = []
+    for chunk in response.streaming_content:
+        chunk = chunk.decode()
+        if chunk.startswith(('retry:', ':')):
+            continue
+        fields = dict(line.split(': ', 1) for line in chunk.split('\n')
+                      if line)
+        messages.append(fields)
+        if len(messages) == count:
+            break
+    return messages
+
+
+@override_settings(SSE_HEARTBEAT_SECONDS=0.01, SSE_STREAM_SECONDS=5)
+class FollowEventsTests(TestCase):
+    def setUp(self):
+        # The TestCase transaction never commits: run on_commit at once.
+        on_commit = mock.patch.object(
+            transaction, 'on_commit', lambda func, using=None: func())
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_new_post_is_pushed_to_followers(self):
+        response = self.reader_client.get(reverse('posts:follow_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        # The stream subscribes when it starts, with the retry line.
+        next(iter(response.streaming_content))
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(reverse('posts:post_create'), {'text': 'new'})
+        post = Post.objects.get()
+        message = events(response, 1)[0]
+        self.assertEqual(message['event'], 'posts')
+        self.assertEqual(message['id'], str(post.pk))
+        self.assertEqual(json.loads(message['data']),
+                         {'count': 1, 'author': 'author'})
+        response.close()
+
+    def test_reconnect_counts_posts_since_last_event(self):
+        first = Post.objects.create(text='first', author=self.author)
+        Post.objects.create(text='second', author=self.author)
+        Post.objects.create(text='third', author=self.author)
+        response = self.reader_client.get(
+            reverse('posts:follow_events'), HTTP_LAST_EVENT_ID=str(first.pk))
+        message = events(response, 1)[0]
+        self.assertEqual(json.loads(message['data']), {'count': 2})
+        response.close()
+
+    def test_unstarted_stream_does_not_subscribe(self):
+        response = self.reader_client.get(reverse('posts:follow_events'))
+        channel = post_events.channel(self.reader.pk)
+        self.assertNotIn(channel, get_broker().channels)
+        next(iter(response.streaming_content))
+        self.assertIn(channel, get_broker().channels)
+        response.close()
+        self.assertNotIn(channel, get_broker().channels)
+
+    def test_stream_requires_login(self):
+        response = Client().get(reverse('posts:follow_events'))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,94 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..feeds import FEED_LENGTH
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='group', slug='group_1', description='description')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.post = Post.objects.create(
+            text='feed text', author=self.user, group=self.group)
+
+    def test_every_listing_serves_every_format(self):
+        feeds = (
+            ('posts:index_feed', ()),
+            ('posts:group_feed', (self.group.slug,)),
+            ('posts:profile_feed', (self.user.username,)),
+        )
+        content_types = {
+            'rss': 'application/rss+xml',
+            'atom': 'application/atom+xml',
+            'json': 'application/feed+json',
+        }
+        for name, args in feeds:
+            for feed_format, content_type in content_types.items():
+                with self.subTest(name=name, format=feed_format):
+                    response = self.client.get(
+                        reverse(name, args=(*args, feed_format)))
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(
+                        response['Content-Type'].startswith(content_type))
+                    self.assertContains(response, 'feed text')
+
+    def test_unknown_format_is_404(self):
+        response = self.client.get(
+            reverse('posts:index_feed', args=('yaml',)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_json_feed_is_bounded(self):
+        for i in range(FEED_LENGTH):
+            Post.objects.create(text=f'text {i}', author=self.user)
+        response = self.client.get(
+            reverse('posts:index_feed', args=('json',)))
+        items = json.loads(response.content)['items']
+        self.assertEqual(len(items), FEED_LENGTH)
+        self.assertEqual(items[0]['content_text'], f'text {FEED_LENGTH - 1}')
+
+    def test_unchanged_feed_is_not_modified(self):
+        address = reverse('posts:index_feed', args=('rss',))
+        etag = self.client.get(address)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_feed_skips_rendering(self):
+        address = reverse('posts:index_feed', args=('atom',))
+        first = self.client.get(address)
+        with self.assertNumQueries(1):
+            second = self.client.get(address)
+        self.assertEqual(first.content, second.content)
+
+    def test_post_writes_change_etag(self):
+        address = reverse('posts:group_feed', args=(self.group.slug, 'rss'))
+        etag = self.client.get(address)['ETag']
+        self.post.text = 'edited text'
+        self.post.save()
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'edited text')
+        self.post.delete()
+        response = self.client.get(
+            address, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'edited text')
+
+    def test_listings_link_their_feeds(self):
+        response = self.client.get(reverse('posts:main_posts'))
+        self.assertContains(
+            response, reverse('posts:index_feed', args=('atom',)))
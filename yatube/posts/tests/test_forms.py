@@ -1,8 +1,15 @@
 from django.test import Client, TestCase, override_settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+from .. import images
 from ..models import Group, Post, User
 from django.conf import settings
+import io
 import tempfile
 import shutil
 
@@ -180,3 +187,33 @@ class PostImageTests(TestCase):
         response = self.authorized_client.post(reverse('posts:post_create'), data=form_data, follow=True)
         self.assertRedirects(response, reverse('posts:profile', kwargs={'username': self.user}))
         self.assertTrue(Post.objects.filter(text='Test top6').exists())
+        self.assertTrue(Post.objects.get(text='Test top6').image)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImagePipelineTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        image = Image.new('RGB', (3000, 100), 'red')
+        exif = image.getexif()
+        exif[0x0112] = 6
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', exif=exif.tobytes())
+        self.name = default_storage.save(
+            'posts/rotated.jpg', ContentFile(buffer.getvalue()))
+
+    def test_upload_is_rotated_stripped_and_capped(self):
+        images.process_upload(self.name)
+        with Image.open(default_storage.path(self.name)) as image:
+            self.assertEqual(image.size, (85, 2560))
+            self.assertNotIn('exif', image.info)
+
+    def test_renditions_are_pregenerated(self):
+        images.process_upload(self.name)
+        thumbnails = default.kvstore._get(
+            ImageFile(self.name).key, identity='thumbnails')
+        self.assertEqual(len(thumbnails), len(images.RENDITIONS))
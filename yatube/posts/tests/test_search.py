@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.user_2 = User.objects.create_user(username='author_2')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='group_1'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.dogs = Post.objects.create(
+            text='собака собака собака и кот',
+            author=self.user,
+            group=self.group
+        )
+        self.cats = Post.objects.create(
+            text='кот на крыше',
+            author=self.user_2
+        )
+
+    def search(self, **params):
+        response = self.guest_client.get(reverse('posts:search'), params)
+        return list(response.context['page_obj'])
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.search(q='собака'), [self.dogs])
+        self.assertEqual(self.search(q='кот крыше'), [self.cats])
+
+    def test_group_and_author_filters(self):
+        self.assertEqual(self.search(q='кот', group=self.group.slug),
+                         [self.dogs])
+        self.assertEqual(self.search(q='кот', author=self.user_2.username),
+                         [self.cats])
+
+    def test_index_follows_edit_and_delete(self):
+        self.cats.text = 'пёс во дворе'
+        self.cats.save()
+        self.assertEqual(self.search(q='крыше'), [])
+        self.assertEqual(self.search(q='дворе'), [self.cats])
+        self.cats.delete()
+        self.assertEqual(self.search(q='дворе'), [])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.search(q='"кот" OR (*'), [])
+
+    def test_cursor_pagination(self):
+        posts = [
+            Post.objects.create(text=f'лес {i}', author=self.user)
+            for i in range(12)
+        ]
+        response = self.guest_client.get(reverse('posts:search'),
+                                         {'q': 'лес'})
+        first_page = response.context['page_obj']
+        self.assertTrue(first_page.has_next())
+        response = self.guest_client.get(
+            reverse('posts:search'),
+            {'q': 'лес', 'after': first_page.next_cursor})
+        second_page = response.context['page_obj']
+        self.assertCountEqual(list(first_page) + list(second_page), posts)
+        previous_page = self.search(
+            q='лес', before=second_page.previous_cursor)
+        self.assertEqual(previous_page, list(first_page))
+
+
+class PostAdminSearchTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.post = Post.objects.create(text='редкое слово',
+                                        author=self.admin)
+        Post.objects.create(text='что-то другое', author=self.admin)
+
+    def test_admin_search_uses_index(self):
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'редкое'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.post])
@@ -0,0 +1,183 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .. import transfer
+from ..models import AuthorStats, Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='group', slug='group_1', description='description')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'dump.jsonl')
+        self.post = Post.objects.create(
+            text='text', author=self.user, group=self.group)
+        self.post.image.save('pic.gif', ContentFile(b'GIF89a'))
+        Post.objects.create(text='text 2', author=self.user)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='comment')
+        Follow.objects.create(user=self.reader, author=self.user)
+
+    def export(self, *args):
+        call_command('export_posts', self.path, *args, stderr=io.StringIO())
+
+    def records(self):
+        with open(self.path) as stream:
+            return [json.loads(line) for line in stream]
+
+    def wipe(self):
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_export_writes_every_section_in_order(self):
+        self.export()
+        kinds = [record['type'] for record in self.records()]
+        self.assertEqual(
+            kinds, ['group', 'post', 'post', 'comment', 'follow'])
+        post = self.records()[1]
+        self.assertEqual(post['author'], 'author')
+        self.assertEqual(post['group'], 'group_1')
+
+    def test_export_resume_drops_partial_line(self):
+        self.export()
+        with open(self.path, 'rb+') as stream:
+            lines = stream.readlines()
+            stream.seek(0)
+            stream.truncate()
+            stream.writelines(lines[:2])
+            stream.write(lines[2][:10])
+        self.export('--resume')
+        self.assertEqual(len(self.records()), 5)
+        self.assertEqual(len({(r['type'], r['id'])
+                              for r in self.records()}), 5)
+
+    def test_import_round_trip(self):
+        self.export()
+        media_from = tempfile.mkdtemp(dir=self.dir)
+        shutil.copytree(os.path.join(TEMP_MEDIA_ROOT, 'posts'),
+                        os.path.join(media_from, 'posts'))
+        pub_date = self.post.pub_date
+        self.post.image.delete(save=False)
+        self.wipe()
+        call_command('import_posts', self.path, '--batch-size', '1',
+                     '--media-from', media_from, stdout=io.StringIO(),
+                     stderr=io.StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.pub_date, pub_date)
+        self.assertEqual(post.group.slug, 'group_1')
+        self.assertEqual(post.image.read(), b'GIF89a')
+        self.assertEqual(post.stats.comment_count, 1)
+        author = User.objects.get(username='author')
+        self.assertFalse(author.has_usable_password())
+        self.assertEqual(AuthorStats.objects.get(user=author).post_count, 2)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='reader').count(), 2)
+        imported = max(record['id'] for record in self.records()
+                       if record['type'] == 'post')
+        self.assertGreater(
+            Post.objects.create(text='new', author=author).pk, imported)
+
+    def test_import_resumes_after_checkpoint(self):
+        self.export()
+        self.wipe()
+        importer = transfer.Importer(batch_size=1)
+        with open(self.path) as stream:
+            for line in list(stream)[:2]:
+                importer.add(json.loads(line))
+        with open(self.path + '.checkpoint', 'w') as stream:
+            stream.write('2')
+        call_command('import_posts', self.path, '--resume',
+                     stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+        author = User.objects.get(username='author')
+        self.assertEqual(AuthorStats.objects.get(user=author).post_count, 2)
+
+    def test_import_renumbers_posts_whose_ids_are_taken(self):
+        self.export()
+        self.wipe()
+        stranger = User.objects.create_user(username='stranger')
+        Group.objects.create(id=self.group.pk, title='other', slug='other')
+        Post.objects.create(id=self.post.pk, text='unrelated',
+                            author=stranger)
+        call_command('import_posts', self.path, '--batch-size', '1',
+                     stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(Post.objects.get(pk=self.post.pk).text, 'unrelated')
+        post = Post.objects.get(text='text')
+        self.assertEqual(post.group.slug, 'group_1')
+        self.assertEqual(list(post.comments.values_list('text', flat=True)),
+                         ['comment'])
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(Group.objects.get(slug='other').pk, self.group.pk)
+
+    def test_import_twice_does_not_duplicate(self):
+        self.export()
+        self.wipe()
+        for _ in range(2):
+            call_command('import_posts', self.path, stdout=io.StringIO(),
+                         stderr=io.StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_import_resumes_with_state_of_earlier_run(self):
+        self.export()
+        self.wipe()
+        importer = transfer.Importer(batch_size=1)
+        with open(self.path) as stream:
+            for line in list(stream)[:3]:
+                importer.add(json.loads(line))
+        with open(self.path + '.checkpoint', 'w') as stream:
+            json.dump({'line': 3, **importer.state()}, stream)
+        call_command('import_posts', self.path, '--resume',
+                     stdout=io.StringIO(), stderr=io.StringIO())
+        author = User.objects.get(username='author')
+        self.assertEqual(AuthorStats.objects.get(user=author).post_count, 2)
+        self.assertEqual(Group.objects.get().stats.post_count, 1)
+        self.assertEqual(
+            Post.objects.get(text='text').stats.comment_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='reader').count(), 2)
+
+    def test_import_leaves_unrelated_timelines_alone(self):
+        self.export()
+        self.wipe()
+        writer = User.objects.create_user(username='writer')
+        follower = User.objects.create_user(username='follower')
+        Post.objects.create(text='unrelated', author=writer)
+        Follow.objects.create(user=follower, author=writer)
+        TimelineEntry.objects.filter(user=follower).delete()
+        call_command('import_posts', self.path, stdout=io.StringIO(),
+                     stderr=io.StringIO())
+        self.assertFalse(TimelineEntry.objects.filter(user=follower).exists())
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='reader').count(), 2)
@@ -0,0 +1,77 @@
+import datetime
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import AuthorStats, Comment, Post, TrendingPost
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def post(self, text, hours_ago=0, comments=0):
+        post = Post.objects.create(text=text, author=self.author)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=self.now - datetime.timedelta(hours=hours_ago))
+        for _ in range(comments):
+            Comment.objects.create(post=post, author=self.reader, text='c')
+        return post
+
+    def ranked(self):
+        return list(TrendingPost.objects.values_list('post__text', flat=True))
+
+    def test_comments_and_age_decide_the_rank(self):
+        self.post('quiet')
+        self.post('discussed', comments=3)
+        self.post('old discussed', hours_ago=48, comments=3)
+        self.post('outside window', hours_ago=24 * 8, comments=10)
+        self.assertEqual(trending.rank(self.now), 3)
+        self.assertEqual(self.ranked(),
+                         ['discussed', 'old discussed', 'quiet'])
+
+    def test_reach_breaks_comment_ties(self):
+        self.post('small')
+        other = User.objects.create_user(username='popular')
+        Post.objects.create(text='large', author=other)
+        AuthorStats.objects.filter(user=other).update(follower_count=100)
+        trending.rank()
+        self.assertEqual(self.ranked()[0], 'large')
+
+    @mock.patch('posts.trending.BATCH_SIZE', 2)
+    @mock.patch('posts.trending.TOP_K', 3)
+    def test_only_top_k_across_batches_is_stored(self):
+        for comments in (0, 4, 1, 3, 2):
+            self.post(f'{comments} comments', comments=comments)
+        trending.rank(self.now)
+        self.assertEqual(self.ranked(),
+                         ['4 comments', '3 comments', '2 comments'])
+        self.assertEqual(
+            list(TrendingPost.objects.values_list('rank', flat=True)),
+            [1, 2, 3])
+
+    def test_popular_page_reads_the_ranking(self):
+        self.post('first', comments=2)
+        self.post('second', comments=1)
+        call_command('rank_trending', stdout=io.StringIO())
+        client = Client()
+        # Session-less guest: cards of the page and their count.
+        with self.assertNumQueries(2):
+            response = client.get(reverse('posts:popular'))
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['first', 'second'])
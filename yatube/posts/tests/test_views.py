@@ -1,15 +1,25 @@
 import datetime
+import importlib
+import io
 import shutil
 import tempfile
+from unittest import mock
 
+from django.apps import apps as django_apps
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django import forms
 from django.conf import settings
 
-from ..models import Post, Group, Comment, Follow
+from .. import following
+from ..models import Post, Group, Comment, Follow, TimelineEntry
+from ..paginators import ELLIPSIS, CursorPaginator, encode_cursor
 
 
 User = get_user_model()
@@ -277,6 +287,173 @@ class PostViewPaginatorTests(TestCase):
                          POST_QUANTITY_ON_SECOND_PAGE)
 
 
+class PostFeedQueryTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='group_1'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        for i in range(POSTS_QUANTITY):
+            Post.objects.create(
+                text=f'test_text {i+1}',
+                author=self.user,
+                group=self.group
+            )
+
+    def test_listing_queries_do_not_depend_on_page_size(self):
+        pages = {
+            reverse('posts:main_posts'): 2,
+            reverse('posts:group_list', args=(self.group.slug,)): 4,
+            reverse('posts:profile', args=(self.user,)): 4,
+        }
+        for address, queries in pages.items():
+            with self.subTest(address=address):
+                with self.assertNumQueries(queries):
+                    self.guest_client.get(address)
+
+
+class PostViewCursorPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.guest_client = Client()
+        for i in range(POSTS_QUANTITY):
+            Post.objects.create(text=f'test_text {i+1}', author=self.user)
+
+    def test_after_cursor_continues_first_page(self):
+        first_page = self.guest_client.get(
+            reverse('posts:main_posts')).context['page_obj']
+        response = self.guest_client.get(
+            reverse('posts:main_posts'),
+            {'after': first_page.next_cursor})
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page), POST_QUANTITY_ON_SECOND_PAGE)
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(second_page.has_previous())
+        self.assertFalse(set(first_page) & set(second_page))
+
+    def test_before_cursor_returns_previous_page(self):
+        first_page = self.guest_client.get(
+            reverse('posts:main_posts')).context['page_obj']
+        second_page = self.guest_client.get(
+            reverse('posts:main_posts'),
+            {'after': first_page.next_cursor}).context['page_obj']
+        response = self.guest_client.get(
+            reverse('posts:main_posts'),
+            {'before': second_page.previous_cursor})
+        self.assertEqual(list(response.context['page_obj']),
+                         list(first_page))
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_cursor_id_out_of_range_falls_back_to_first_page(self):
+        token = encode_cursor(
+            [datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc),
+             99999999999999999999999])
+        response = self.guest_client.get(
+            reverse('posts:main_posts'), {'after': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']),
+                         POSTS_QUANTITY_ON_FIRST_PAGE)
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': self.user}),
+            {'after': 'not-a-cursor'})
+        self.assertEqual(len(response.context['page_obj']),
+                         POSTS_QUANTITY_ON_FIRST_PAGE)
+
+
+class PostViewCountCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='group', slug='group_1')
+        cls.group_2 = Group.objects.create(title='group_2', slug='group_2')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            text='test_text', author=self.user, group=self.group)
+
+    def count_on(self, address):
+        return self.guest_client.get(address).context[
+            'page_obj'].paginator.count
+
+    def test_count_is_cached_between_requests(self):
+        self.guest_client.get(reverse('posts:main_posts'))
+        with self.assertNumQueries(1):
+            self.guest_client.get(reverse('posts:main_posts'))
+
+    def test_new_and_deleted_posts_reset_counts(self):
+        index = reverse('posts:main_posts')
+        group = reverse('posts:group_list', args=(self.group.slug,))
+        self.assertEqual(self.count_on(index), 1)
+        self.assertEqual(self.count_on(group), 1)
+        Post.objects.create(text='new', author=self.user, group=self.group)
+        self.assertEqual(self.count_on(index), 2)
+        self.assertEqual(self.count_on(group), 2)
+        self.post.delete()
+        self.assertEqual(self.count_on(index), 1)
+        self.assertEqual(self.count_on(group), 1)
+
+    def test_moving_post_resets_both_group_counts(self):
+        old = reverse('posts:group_list', args=(self.group.slug,))
+        new = reverse('posts:group_list', args=(self.group_2.slug,))
+        self.assertEqual(self.count_on(old), 1)
+        self.assertEqual(self.count_on(new), 0)
+        self.post.group = self.group_2
+        self.post.save()
+        self.assertEqual(self.count_on(old), 0)
+        self.assertEqual(self.count_on(new), 1)
+
+    def test_elided_page_range(self):
+        paginator = CursorPaginator(Post.objects.all(), 1, count=50)
+        pages = {
+            1: [1, 2, 3, 4, ELLIPSIS, 50],
+            5: [1, 2, 3, 4, 5, 6, 7, 8, ELLIPSIS, 50],
+            25: [1, ELLIPSIS, 22, 23, 24, 25, 26, 27, 28, ELLIPSIS, 50],
+            50: [1, ELLIPSIS, 47, 48, 49, 50],
+        }
+        for number, window in pages.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(paginator.get_elided_page_range(number)), window)
+        short = CursorPaginator(Post.objects.all(), 1, count=9)
+        self.assertEqual(list(short.get_elided_page_range(5)),
+                         list(range(1, 10)))
+
+    def test_template_renders_page_window(self):
+        for i in range(POSTS_QUANTITY * 7):
+            Post.objects.create(text=f'text {i}', author=self.user)
+        for address in (reverse('posts:main_posts'),
+                        reverse('posts:profile', args=(self.user,))):
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertContains(response, ELLIPSIS)
+                self.assertContains(response, '?page=4"')
+                self.assertNotContains(response, '?page=6"')
+        cursor = response.context['page_obj'].next_cursor
+        response = self.guest_client.get(
+            reverse('posts:main_posts'), {'after': cursor})
+        self.assertContains(response, '?before=')
+        self.assertNotContains(response, '?page=')
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostImageTests(TestCase):
     @classmethod
@@ -365,6 +542,7 @@ class FollowViewTests(TestCase):
         cls.user_2 = User.objects.create_user(username='author_2')
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -383,6 +561,34 @@ class FollowViewTests(TestCase):
         self.assertEqual(last_follow.author, self.user)
         self.assertEqual(last_follow.user, self.user_2)
 
+    def test_follow_state_is_cached(self):
+        Follow.objects.create(user=self.user_2, author=self.user)
+        self.assertTrue(following.is_following(self.user_2.pk, self.user.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                following.is_following(self.user_2.pk, self.user.pk))
+            self.assertFalse(
+                following.is_following(self.user_2.pk, self.user_2.pk))
+
+    def test_follow_state_of_64_bit_ids(self):
+        author = User.objects.create_user(username='far', id=2 ** 40)
+        Follow.objects.create(user=self.user_2, author=author)
+        self.assertTrue(following.is_following(self.user_2.pk, author.pk))
+        self.assertFalse(following.is_following(author.pk, self.user_2.pk))
+
+    def test_profile_shows_follow_state_after_changes(self):
+        profile = reverse('posts:profile', args=(self.user.username,))
+        response = self.authorized_client.get(profile)
+        self.assertFalse(response.context['following'])
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args={self.user}))
+        response = self.authorized_client.get(profile)
+        self.assertTrue(response.context['following'])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args={self.user}))
+        response = self.authorized_client.get(profile)
+        self.assertFalse(response.context['following'])
+
     def test_post_after_following(self):
         self.authorized_client.get(
             reverse('posts:profile_follow', args={self.user}))
@@ -390,3 +596,122 @@ class FollowViewTests(TestCase):
             reverse('posts:follow_index'))
         post_follow = response.context['page_obj'][0]
         self.assertEqual(post_follow, self.post)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args={self.user}))
+        new_post = Post.objects.create(text='fresh', author=self.user)
+        response = self.authorized_client.get(
+            reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], new_post)
+
+    def test_unfollow_trims_timeline(self):
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args={self.user}))
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args={self.user}))
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.user_2).exists())
+        response = self.authorized_client.get(
+            reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    @mock.patch('posts.timeline.TIMELINE_LENGTH', 2)
+    def test_timeline_is_capped(self):
+        Follow.objects.create(user=self.user_2, author=self.user)
+        for i in range(3):
+            Post.objects.create(text=f'text {i}', author=self.user)
+        call_command('rebuild_timelines', '--trim', stdout=io.StringIO())
+        entries = TimelineEntry.objects.filter(user=self.user_2)
+        self.assertEqual(
+            list(entries.values_list('post__text', flat=True)),
+            ['text 2', 'text 1'])
+
+    def test_fan_out_cost_does_not_grow_with_followers(self):
+        Follow.objects.create(user=self.user_2, author=self.user)
+        with CaptureQueriesContext(connection) as one_follower:
+            Post.objects.create(text='one', author=self.user)
+        for i in range(3):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f'reader_{i}'),
+                author=self.user)
+        with self.assertNumQueries(len(one_follower)):
+            Post.objects.create(text='four', author=self.user)
+
+    def test_rebuild_timelines_command(self):
+        Follow.objects.create(user=self.user_2, author=self.user)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', self.user_2.username,
+                     stdout=io.StringIO())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user_2, post=self.post).exists())
+
+    def test_migration_fills_existing_timelines(self):
+        Follow.objects.create(user=self.user_2, author=self.user)
+        TimelineEntry.objects.all().delete()
+        migration = importlib.import_module(
+            'posts.migrations.0002_timelineentry')
+        migration.fill_timelines(django_apps, None)
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(user=self.user_2)
+                 .values_list('post_id', flat=True)),
+            [self.post.id])
+
+    def test_follow_pair_is_unique(self):
+        for _ in range(2):
+            self.authorized_client.get(
+                reverse('posts:profile_follow', args={self.user}))
+        self.assertEqual(Follow.objects.count(), 1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.user_2, author=self.user)
+
+
+class PostCommentsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='text', author=cls.user)
+        readers = [User.objects.create_user(username=f'reader_{i}')
+                   for i in range(5)]
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=readers[i % 5], text=f'comment {i}')
+            for i in range(25))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_first_comments_are_rendered_inline(self):
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=(self.post.id,)))
+        comments = response.context['comments']
+        self.assertEqual([comment.text for comment in comments],
+                         [f'comment {i}' for i in range(20)])
+        self.assertContains(
+            response, reverse('posts:post_comments', args=(self.post.id,))
+            + f'?after={comments.next_cursor}')
+
+    def test_load_more_continues_after_cursor(self):
+        first = self.guest_client.get(
+            reverse('posts:post_detail', args=(self.post.id,)))
+        response = self.guest_client.get(
+            reverse('posts:post_comments', args=(self.post.id,)),
+            {'after': first.context['comments'].next_cursor})
+        self.assertTemplateUsed(response, 'includes/comments.html')
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'comment {i}' for i in range(20, 25)])
+        self.assertNotContains(response, 'data-more-comments')
+
+    def test_comment_authors_are_joined(self):
+        address = reverse('posts:post_comments', args=(self.post.id,))
+        # Post lookup for the ETag, post existence, comments with authors.
+        with self.assertNumQueries(3):
+            response = self.guest_client.get(address)
+        self.assertContains(response, 'reader_4')
+
+    def test_comments_of_missing_post(self):
+        response = self.guest_client.get(
+            reverse('posts:post_comments', args=(self.post.id + 1,)))
+        self.assertEqual(response.status_code, 404)
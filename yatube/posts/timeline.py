@@ -0,0 +1,91 @@
+from django.db import connection, transaction
+
+from .models import Follow, Post, TimelineEntry
+
+TIMELINE_LENGTH = 1000
+TIMELINE_ORDERING = ('pub_date', 'post_id')
+BATCH_SIZE = 500
+TRIM_SQL = (
+    'DELETE FROM {table} WHERE id IN ('
+    'SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+    'PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC'
+    ') AS position FROM {table}) AS ranked WHERE position > %s)'
+)
+
+
+def _entries(user_id, posts):
+    return [
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    ]
+
+
+def trim(user_ids):
+    """Keep only the newest TIMELINE_LENGTH entries of every timeline."""
+    for user_id in user_ids:
+        stale = list(
+            TimelineEntry.objects.filter(user_id=user_id)
+            .values_list('id', flat=True)[TIMELINE_LENGTH:]
+        )
+        if stale:
+            TimelineEntry.objects.filter(id__in=stale).delete()
+
+
+def trim_all():
+    """Cap every timeline with one statement, return the deleted count.
+
+    fan_out does not trim: a timeline grows by one entry per new post
+    and ``rebuild_timelines --trim`` caps them all periodically. Only
+    the newest entries are ever shown, so the surplus is harmless.
+    """
+    table = connection.ops.quote_name(TimelineEntry._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(TRIM_SQL.format(table=table), [TIMELINE_LENGTH])
+        return cursor.rowcount
+
+
+@transaction.atomic
+def fan_out(post):
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+    )
+    entries = [
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in follower_ids
+    ]
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+    return follower_ids
+
+
+@transaction.atomic
+def backfill(user_id, author_id):
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .values_list('id', 'pub_date')[:TIMELINE_LENGTH]
+    )
+    TimelineEntry.objects.bulk_create(
+        _entries(user_id, posts), batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    trim([user_id])
+
+
+def drop_author(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+@transaction.atomic
+def rebuild(user_id):
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    posts = (
+        Post.objects.filter(author__following__user_id=user_id)
+        .values_list('id', 'pub_date')[:TIMELINE_LENGTH]
+    )
+    TimelineEntry.objects.bulk_create(
+        _entries(user_id, posts), batch_size=BATCH_SIZE
+    )
@@ -0,0 +1,359 @@
+import json
+import os
+import shutil
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from . import counters, following, timeline
+from .models import Comment, Follow, Group, Post, PostStats, User
+from .paginators import count_key, forget_counts
+
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+
+# (kind, model, {record key: values() lookup}), in dependency order.
+SECTIONS = (
+    ('group', Group, {
+        'id': 'id', 'title': 'title', 'slug': 'slug',
+        'description': 'description',
+    }),
+    ('post', Post, {
+        'id': 'id', 'text': 'text', 'pub_date': 'pub_date',
+        'author': 'author__username', 'group': 'group__slug',
+        'image': 'image',
+    }),
+    ('comment', Comment, {
+        'id': 'id', 'post': 'post_id', 'author': 'author__username',
+        'text': 'text', 'created': 'created',
+    }),
+    ('follow', Follow, {
+        'id': 'id', 'user': 'user__username', 'author': 'author__username',
+    }),
+)
+KINDS = [kind for kind, _, _ in SECTIONS]
+
+
+def _encode(value):
+    # DjangoJSONEncoder cuts microseconds, which would reorder posts.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Cannot serialize {type(value).__name__}')
+
+
+def dump(kind, record):
+    return json.dumps({'type': kind, **record}, default=_encode,
+                      ensure_ascii=False)
+
+
+def export_records(after=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield ``(kind, record)`` pairs, every section ordered by id.
+
+    ``after`` is the ``(kind, id)`` of the last record already written,
+    so an interrupted export can be continued from there. Rows are read
+    with ``values().iterator()``, memory use does not grow with the data.
+    """
+    start_kind, start_id = after or (KINDS[0], None)
+    for kind, model, fields in SECTIONS[KINDS.index(start_kind):]:
+        rows = model.objects.order_by('id')
+        if kind == start_kind and start_id is not None:
+            rows = rows.filter(id__gt=start_id)
+        for row in rows.values(*fields.values()).iterator(
+                chunk_size=chunk_size):
+            yield kind, {key: row[lookup] for key, lookup in fields.items()}
+
+
+def last_record(path):
+    """Return ``(kind, id)`` of the last complete line of an export.
+
+    A half written trailing line is cut off, so appending to the file
+    continues the stream cleanly.
+    """
+    last, end = None, 0
+    with open(path, 'rb+') as stream:
+        for line in stream:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                last = json.loads(line)
+            except ValueError:
+                break
+            end += len(line)
+        stream.truncate(end)
+    if last is None:
+        return None
+    return last['type'], last['id']
+
+
+@contextmanager
+def keep_dates():
+    """Let bulk_create store exported dates instead of auto_now_add."""
+    fields = [Post._meta.get_field('pub_date'),
+              Comment._meta.get_field('created')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    """Batch JSON Lines records into ``bulk_create`` calls.
+
+    Posts and comments keep their source ids where those are free in
+    this database. A taken id means either a batch that is loaded
+    twice, recognized by the natural key (author and date) and skipped,
+    or an unrelated row, in which case the record gets a new id and
+    ``post_ids`` maps the source post id to it for its comments. Groups
+    are matched by slug and users by username; missing users are created
+    without a usable password.
+
+    Signals do not fire on bulk inserts. Comment counters are updated
+    with every batch; ``finish`` recounts the authors and groups the
+    import touched and rebuilds the timelines of their followers.
+    ``state`` carries all of that across a resumed run.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, media_from=None,
+                 state=None):
+        state = state or {}
+        self.batch_size = batch_size
+        self.media_from = media_from
+        self.post_ids = {
+            int(source): local
+            for source, local in state.get('posts', {}).items()
+        }
+        self.authors = set(state.get('authors', ()))
+        self.posters = set(state.get('posters', ()))
+        self.followers = set(state.get('followers', ()))
+        self.group_ids = set(state.get('groups', ()))
+        self.kind = None
+        self.batch = []
+        self.users = {}
+        self.groups = {}
+        self.loaded = dict.fromkeys(KINDS, 0)
+
+    def state(self):
+        """What ``finish`` needs to know about the batches written so far.
+
+        ``post_ids`` maps renumbered posts, ``posters`` are the authors of
+        imported posts and ``followers`` the users of imported follows.
+        """
+        return {
+            'posts': self.post_ids,
+            'authors': sorted(self.authors),
+            'posters': sorted(self.posters),
+            'followers': sorted(self.followers),
+            'groups': sorted(self.group_ids),
+        }
+
+    def add(self, record):
+        """Queue a record, return True when a batch has been written."""
+        kind = record.pop('type')
+        if kind not in KINDS:
+            raise ValueError(f'Unknown record type: {kind!r}')
+        flushed = False
+        if kind != self.kind:
+            flushed = self.flush()
+            self.kind = kind
+        self.batch.append(record)
+        if len(self.batch) >= self.batch_size:
+            flushed = self.flush() or flushed
+        return flushed
+
+    def _user_ids(self, usernames):
+        missing = set(usernames) - self.users.keys()
+        if missing:
+            self.users.update(User.objects.filter(
+                username__in=missing).values_list('username', 'id'))
+            new = missing - self.users.keys()
+            User.objects.bulk_create(
+                [User(username=name, password=make_password(None))
+                 for name in new],
+                ignore_conflicts=True,
+            )
+            self.users.update(User.objects.filter(
+                username__in=new).values_list('username', 'id'))
+        return self.users
+
+    def _group_ids(self, slugs):
+        missing = {slug for slug in slugs if slug} - self.groups.keys()
+        if missing:
+            self.groups.update(Group.objects.filter(
+                slug__in=missing).values_list('slug', 'id'))
+        return self.groups
+
+    def _copy_image(self, name):
+        if not name or self.media_from is None:
+            return
+        if default_storage.exists(name):
+            return
+        with open(os.path.join(self.media_from, name), 'rb') as source:
+            target = default_storage.path(name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as copy:
+                shutil.copyfileobj(source, copy)
+
+    def _place(self, model, objects, natural_key):
+        """Return the objects to insert and ``{source id: local id}``.
+
+        Objects keep free ids. One whose id is taken is dropped when a
+        row with the same natural key exists and renumbered otherwise.
+        """
+        ids = [obj.id for obj in objects]
+        taken = set(model.objects.filter(id__in=ids).values_list(
+            'id', flat=True))
+        if not taken:
+            return objects, {}
+        top = model.objects.aggregate(top=Max('id'))['top'] or 0
+        next_id = max(top, *ids) + 1
+        placed, moved = [], {}
+        for obj in objects:
+            if obj.id not in taken:
+                placed.append(obj)
+                continue
+            local_id = model.objects.filter(**{
+                field: getattr(obj, field) for field in natural_key
+            }).values_list('id', flat=True).first()
+            if local_id is None:
+                local_id, next_id = next_id, next_id + 1
+                placed.append(obj)
+            moved[obj.id] = local_id
+            obj.id = local_id
+        return placed, moved
+
+    def _groups(self, records):
+        Group.objects.bulk_create(
+            [Group(title=record['title'], slug=record['slug'],
+                   description=record['description'])
+             for record in records],
+            ignore_conflicts=True,
+        )
+        groups = self._group_ids(record['slug'] for record in records)
+        self.group_ids.update(groups[record['slug']] for record in records)
+
+    def _posts(self, records):
+        users = self._user_ids(record['author'] for record in records)
+        groups = self._group_ids(record['group'] for record in records)
+        posts = []
+        for record in records:
+            self._copy_image(record['image'])
+            author_id = users[record['author']]
+            group_id = groups.get(record['group'])
+            self.authors.add(author_id)
+            self.posters.add(author_id)
+            if group_id is not None:
+                self.group_ids.add(group_id)
+            posts.append(Post(
+                id=record['id'], text=record['text'],
+                pub_date=parse_datetime(record['pub_date']),
+                author_id=author_id, group_id=group_id,
+                image=record['image'] or '',
+            ))
+        posts, moved = self._place(Post, posts, ('author_id', 'pub_date'))
+        self.post_ids.update(moved)
+        Post.objects.bulk_create(posts)
+        PostStats.objects.bulk_create(
+            [PostStats(post_id=post.id) for post in posts],
+            ignore_conflicts=True,
+        )
+
+    def _comments(self, records):
+        users = self._user_ids(record['author'] for record in records)
+        comments = [
+            Comment(id=record['id'],
+                    post_id=self.post_ids.get(record['post'], record['post']),
+                    author_id=users[record['author']], text=record['text'],
+                    created=parse_datetime(record['created']))
+            for record in records
+        ]
+        known = set(Post.objects.filter(
+            id__in=[comment.post_id for comment in comments]
+        ).values_list('id', flat=True))
+        comments, _ = self._place(
+            Comment, [comment for comment in comments
+                      if comment.post_id in known],
+            ('post_id', 'author_id', 'created'))
+        Comment.objects.bulk_create(comments)
+        added = Counter(comment.post_id for comment in comments)
+        for post_id, count in added.items():
+            counters.change_comments(post_id, count)
+
+    def _follows(self, records):
+        users = self._user_ids(
+            name for record in records
+            for name in (record['user'], record['author'])
+        )
+        follows = [
+            Follow(user_id=users[record['user']],
+                   author_id=users[record['author']])
+            for record in records if record['user'] != record['author']
+        ]
+        for follow in follows:
+            self.authors.update((follow.user_id, follow.author_id))
+            self.followers.add(follow.user_id)
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+
+    def flush(self):
+        if not self.batch:
+            return False
+        write = {
+            'group': self._groups,
+            'post': self._posts,
+            'comment': self._comments,
+            'follow': self._follows,
+        }[self.kind]
+        with transaction.atomic(), keep_dates():
+            write(self.batch)
+        self.loaded[self.kind] += len(self.batch)
+        self.batch = []
+        return True
+
+    def _timeline_owners(self):
+        """Followers of the imported posts' authors and new followers."""
+        owners = set(self.followers)
+        posters = sorted(self.posters)
+        for start in range(0, len(posters), IMPORT_BATCH_SIZE):
+            owners.update(
+                Follow.objects.filter(
+                    author_id__in=posters[start:start + IMPORT_BATCH_SIZE])
+                .values_list('user_id', flat=True).distinct()
+            )
+        return owners
+
+    def finish(self, everything=False):
+        """Write the last batch and rebuild what bulk inserts skipped.
+
+        Only what the import touched is rebuilt. A resumed run without
+        the ``state`` of the earlier ones passes ``everything=True`` to
+        rebuild all of it.
+        """
+        self.flush()
+        models = [Group, Post, Comment, Follow, User]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        if everything:
+            counters.recount_posts()
+            self.authors = set(User.objects.values_list('id', flat=True))
+            self.group_ids = set(Group.objects.values_list('id', flat=True))
+            self.posters = set(self.authors)
+            self.followers = set(
+                Follow.objects.values_list('user_id', flat=True).distinct())
+        counters.recount_authors(self.authors)
+        counters.recount_groups(self.group_ids)
+        owners = self._timeline_owners()
+        for user_id in sorted(owners):
+            timeline.rebuild(user_id)
+        following.forget(*self.followers)
+        forget_counts(count_key('all'), *(
+            count_key('group', group_id) for group_id in self.group_ids
+        ))
@@ -0,0 +1,84 @@
+"""Popular posts: recent posts ranked by comment velocity and reach.
+
+    score = (COMMENT_WEIGHT * comments in the last VELOCITY_WINDOW
+             + REACH_WEIGHT * log(1 + followers of the author))
+            * 0.5 ** (age / HALF_LIFE)
+
+``rank`` walks the posts of the last WINDOW in id order, BATCH_SIZE at a
+time, keeps the TOP_K best scores in a heap and replaces TrendingPost
+with them, so the popular page is a plain read of that table.
+"""
+import datetime
+import heapq
+import math
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Comment, Post, TrendingPost
+
+WINDOW = datetime.timedelta(days=7)
+VELOCITY_WINDOW = datetime.timedelta(hours=24)
+HALF_LIFE = datetime.timedelta(hours=24)
+COMMENT_WEIGHT = 1.0
+REACH_WEIGHT = 0.5
+TOP_K = 100
+BATCH_SIZE = 500
+
+
+def score(recent_comments, followers, age):
+    decay = 0.5 ** (max(age, datetime.timedelta()) / HALF_LIFE)
+    return (COMMENT_WEIGHT * recent_comments
+            + REACH_WEIGHT * math.log1p(followers)) * decay
+
+
+def _batches(since):
+    posts = (
+        Post.objects.filter(pub_date__gte=since).order_by('id')
+        .values_list('id', 'pub_date', 'author__author_stats__follower_count')
+    )
+    last_id = 0
+    while True:
+        batch = list(posts.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def _recent_comments(first_id, last_id, since):
+    """Fresh comments per post for a range of ids, in one query."""
+    return dict(
+        Comment.objects.filter(post_id__gte=first_id, post_id__lte=last_id,
+                               created__gte=since)
+        .order_by().values('post_id').annotate(count=Count('id'))
+        .values_list('post_id', 'count')
+    )
+
+
+def rank(now=None):
+    """Recompute TrendingPost, return the number of ranked posts."""
+    now = now or timezone.now()
+    top = []
+    for batch in _batches(now - WINDOW):
+        comments = _recent_comments(
+            batch[0][0], batch[-1][0], now - VELOCITY_WINDOW)
+        for post_id, pub_date, followers in batch:
+            item = (
+                score(comments.get(post_id, 0), followers or 0,
+                      now - pub_date),
+                post_id,
+            )
+            if len(top) < TOP_K:
+                heapq.heappush(top, item)
+            else:
+                heapq.heappushpop(top, item)
+    ranked = sorted(top, reverse=True)
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(
+            TrendingPost(post_id=post_id, rank=number, score=value)
+            for number, (value, post_id) in enumerate(ranked, 1)
+        )
+    return len(ranked)
@@ -5,9 +5,28 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='main_posts'),
+    path('popular/', views.popular, name='popular'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('feeds/<str:feed_format>/', views.index_feed, name='index_feed'),
+    path(
+        'group/<slug:slug>/feeds/<str:feed_format>/',
+        views.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/feeds/<str:feed_format>/',
+        views.profile_feed,
+        name='profile_feed'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    path('search/', views.search, name='search'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -15,6 +34,7 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/events/', views.follow_events, name='follow_events'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
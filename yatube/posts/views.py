@@ -1,33 +1,79 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
 
+from core.throttling import throttle
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Comment, Follow
+from . import conditional, events, feeds, following, images
+from .counters import author_stats
+from .models import Post, Group, User, Comment, Follow, TimelineEntry
+from .paginators import (
+    COMMENT_ORDERING, COMMENT_QUANTITY, GROUP_QUANTITY, POST_QUANTITY,
+    TRENDING_ORDERING, CursorPaginator, count_key, get_page
+)
+from .search import SearchPaginator
+from .timeline import TIMELINE_ORDERING
 from django.views.decorators.cache import cache_page
 from django.contrib.auth.models import User
 
 
-POST_QUANTITY = 10
-
-
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
-    paginator = Paginator(post_list, POST_QUANTITY)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    page_obj = get_page(request, post_list, count_key=count_key('all'))
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+def popular(request):
+    """Posts ranked by ``rank_trending``, read from TrendingPost."""
+    posts = Post.objects.for_feed().filter(trending__isnull=False).annotate(
+        rank=F('trending__rank'))
+    paginator = CursorPaginator(posts, POST_QUANTITY,
+                                ordering=TRENDING_ORDERING, descending=False)
+    context = {
+        'page_obj': paginator.get_page(request.GET.get('page')),
+    }
+    return render(request, 'posts/popular.html', context)
+
+
+GROUP_SORTS = {
+    'posts': ('post_count', True),
+    'latest': ('latest_pub_date', True),
+    'authors': ('author_count', True),
+    'title': ('title', False),
+}
+
+
+def group_index(request):
+    """Directory of groups, read from GroupStats without touching posts."""
+    sort = request.GET.get('sort')
+    if sort not in GROUP_SORTS:
+        sort = 'posts'
+    field, descending = GROUP_SORTS[sort]
+    groups = Group.objects.annotate(
+        post_count=F('stats__post_count'),
+        author_count=F('stats__author_count'),
+        latest_pub_date=F('stats__latest_pub_date'),
+    )
+    paginator = CursorPaginator(groups, GROUP_QUANTITY,
+                                ordering=(field, 'id'), descending=descending)
+    context = {
+        'sort': sort,
+        'page_obj': paginator.get_page(request.GET.get('page')),
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+@conditional.page(conditional.group_posts_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, POST_QUANTITY)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.for_feed()
+    page_obj = get_page(request, posts,
+                        count_key=count_key('group', group.pk))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -35,59 +81,137 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional.page(conditional.profile_etag)
 def profile(request, username):
 
     username = get_object_or_404(User, username=username)
-    user_posts = Post.objects.filter(author=username)
-    total_num_posts = user_posts.count
-    paginator = Paginator(user_posts, POST_QUANTITY)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    following = False
+    user_posts = Post.objects.for_feed().filter(author=username)
+    stats = author_stats(username.pk)
+    page_obj = get_page(request, user_posts, count=stats.post_count)
+    is_following = False
     if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=username
-        ).exists()
+        is_following = following.is_following(request.user.pk, username.pk)
 
     context = {
         'username': username,
         'page_obj': page_obj,
-        'total_num_posts': total_num_posts,
-        'following': following
+        'total_num_posts': stats.post_count,
+        'stats': stats,
+        'following': is_following
     }
     return render(request, 'posts/profile.html', context)
 
 
+def index_feed(request, feed_format):
+    listing = feeds.Listing(
+        scope='all',
+        title='Yatube: последние записи',
+        link=reverse('posts:main_posts'),
+        description='Последние записи на Yatube',
+        posts=Post.objects.all(),
+    )
+    return feeds.serve(request, listing, feed_format)
+
+
+def group_feed(request, slug, feed_format):
+    group = get_object_or_404(Group, slug=slug)
+    listing = feeds.Listing(
+        scope=f'group:{group.pk}',
+        title=f'Yatube: {group.title}',
+        link=reverse('posts:group_list', args=(group.slug,)),
+        description=group.description,
+        posts=group.posts.all(),
+    )
+    return feeds.serve(request, listing, feed_format)
+
+
+def profile_feed(request, username, feed_format):
+    author = get_object_or_404(User, username=username)
+    listing = feeds.Listing(
+        scope=f'author:{author.pk}',
+        title=f'Yatube: записи {author.username}',
+        link=reverse('posts:profile', args=(author.username,)),
+        description=f'Записи пользователя {author.username}',
+        posts=author.posts.all(),
+    )
+    return feeds.serve(request, listing, feed_format)
+
+
+@conditional.page(conditional.post_detail_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_number = Post.objects.filter(
-        author=post.author).count()
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id)
+    post_number = author_stats(post.author_id).post_count
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
 
     context = {
         'post': post,
-        'posts': post_number,
+        'post_number': post_number,
         'form': form,
-        'comments': comments
+        'comments': _comment_page(post.id),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@conditional.page(conditional.post_detail_etag)
+def post_comments(request, post_id):
+    """The next comments of a post, as a fragment for "load more"."""
+    get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'post_id': post_id,
+        'comments': _comment_page(post_id, after=request.GET.get('after')),
+    }
+    return render(request, 'includes/comments.html', context)
+
+
+def _comment_page(post_id, after=None):
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author').only('text', 'created', 'post_id', 'author__username')
+    paginator = CursorPaginator(comments, COMMENT_QUANTITY,
+                                ordering=COMMENT_ORDERING, descending=False)
+    return paginator.get_cursor_page(after=after)
+
+
+def search(request):
+    query = request.GET.get('q', '')
+    group = author = None
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    paginator = SearchPaginator(query, group=group, author=author)
+    page_obj = paginator.get_cursor_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    context = {
+        'query': query,
+        'group': group,
+        'author': author,
+        'groups': Group.objects.only('slug', 'title'),
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required()
+@throttle('post_create')
+@transaction.atomic
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST':
         if form.is_valid():
             post = form.save(False)
             post.author = request.user
             post.save()
+            if 'image' in form.changed_data:
+                images.schedule(post.image)
             return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
 
 @login_required
+@throttle('post_edit')
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = PostForm(request.POST or None,
@@ -99,6 +223,8 @@ def post_edit(request, post_id):
 
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            images.schedule(post.image)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'post': post,
@@ -109,6 +235,8 @@ def post_edit(request, post_id):
 
 
 @login_required
+@throttle('add_comment')
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -122,16 +250,29 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.select_related('author', 'group').filter(
-        author__following__user=request.user)
-    paginator = Paginator(posts, POST_QUANTITY)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {'page_obj': page_obj}
+    entries = TimelineEntry.objects.filter(user=request.user).only(
+        *TIMELINE_ORDERING)
+    page_obj = get_page(request, entries, ordering=TIMELINE_ORDERING)
+    posts = Post.objects.for_feed().in_bulk(
+        [entry.post_id for entry in page_obj])
+    page_obj.object_list = [
+        posts[entry.post_id] for entry in page_obj if entry.post_id in posts
+    ]
+    context = {
+        'page_obj': page_obj,
+        'newest_id': entries.values_list('post_id', flat=True).first() or 0,
+    }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+def follow_events(request):
+    return events.stream_response(request)
+
+
+@login_required
+@throttle('follow', methods=('GET', 'POST'))
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     user = request.user
@@ -141,6 +282,8 @@ def profile_follow(request, username):
 
 
 @login_required
+@throttle('follow', methods=('GET', 'POST'))
+@transaction.atomic
 def profile_unfollow(request, username):
     user_follower = get_object_or_404(
         Follow,
@@ -46,10 +46,14 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,6 +89,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Warm the application up as it is loaded, see core.warmup.
+WARMUP = os.environ.get('WARMUP') == '1'
 
 CACHES = {
     'default': {
@@ -96,13 +102,77 @@ CACHES = {
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# SQLITE_PROFILE=production, the default, turns on WAL, memory mapping
+# and persistent connections. SQLITE_PROFILE=stock keeps SQLite's own
+# settings, e.g. for a database on a network file system, where WAL and
+# mmap do not work. `manage.py bench_sqlite` compares the two.
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+SQLITE_PRODUCTION = SQLITE_PROFILE == 'production'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, '../db.sqlite3'),
+        # Keep connections between requests instead of reopening the
+        # file and re-running the pragmas below every time.
+        'CONN_MAX_AGE': int(os.environ.get(
+            'CONN_MAX_AGE', 600 if SQLITE_PRODUCTION else 0)),
     }
 }
 
+# Applied to every new SQLite connection by core.sqlite. WAL lets
+# readers run next to the single writer. busy_timeout, in every
+# profile, makes writers queue instead of failing with "database is
+# locked"; it is the only lock timeout, the driver's is not set.
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+SQLITE_PRAGMAS = (
+    SQLITE_PRODUCTION_PRAGMAS if SQLITE_PRODUCTION
+    else {'busy_timeout': SQLITE_PRODUCTION_PRAGMAS['busy_timeout']}
+)
+
+# Read replicas. DATABASE_REPLICAS=2 adds replica_1 and replica_2, file
+# copies of the primary refreshed by `manage.py sync_replicas`. Tests
+# mirror them to the test database.
+
+DATABASE_REPLICAS = [
+    f'replica_{number}'
+    for number in range(1, int(os.environ.get('DATABASE_REPLICAS', 0)) + 1)
+]
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, f'../db.{alias}.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Pages with ETags (posts.conditional.page) always read from the primary.
+REPLICA_VIEWS = (
+    'posts:main_posts',
+    'posts:popular',
+    'posts:group_index',
+    'posts:follow_index',
+    'about:author',
+    'about:tech',
+    'api:posts',
+    'api:posts_batch',
+    'api:post',
+    'api:comments',
+    'api:group_posts',
+    'api:profile_posts',
+    'api:follow_posts',
+)
+REPLICA_STICKY_COOKIE = 'primary_reads'
+REPLICA_STICKY_SECONDS = 10
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -137,6 +207,57 @@ USE_TZ = True
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:main_posts'
 
+# Server-sent events, see posts.events
+
+PUBSUB_BROKER = 'core.pubsub.InProcessBroker'
+PUBSUB_BUFFER_SIZE = 100
+SSE_HEARTBEAT_SECONDS = 15
+SSE_STREAM_SECONDS = 5 * 60
+
+# Write limits, see core.throttling
+
+THROTTLE_RATES = {
+    'post_create': '10/m',
+    'post_edit': '30/m',
+    'add_comment': '30/m',
+    'follow': '60/m',
+}
+WRITE_CONCURRENCY = 4
+WRITE_QUEUE_SECONDS = 2
+
+# Request profiling, see core.middleware.ProfilingMiddleware
+
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING') == '1'
+SLOW_QUERY_MS = 100
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': os.path.join(BASE_DIR, 'slow_queries.log'),
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
+# collectstatic writes hashed and precompressed files, see core.staticfiles.
+
+STATIC_ROOT = os.path.join(BASE_DIR, '../staticfiles')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStorage'
+# Serve STATIC_ROOT from Django itself instead of a front-end server.
+STATIC_SERVE = os.environ.get('STATIC_SERVE') == '1'
+STATIC_MAX_AGE = 60 * 60 * 24 * 365